@@ -0,0 +1 @@
+"""Безголовые бенчмарки: python -m benchmarks.<имя>"""
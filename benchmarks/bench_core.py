@@ -0,0 +1,203 @@
+"""
+Ядро игры под обработчиками интерфейса, без дисплея.
+
+    python -m benchmarks.bench_core --out base.jsonl
+    python -m benchmarks.bench_core --compare base.jsonl
+
+Случаи (на полях 8x8 и больше, при разной заполненности):
+    touch_up         Board.fits — проверка установки в SlotWidget.on_touch_up
+    check_lines      Board.clear_lines — GameScreen.check_lines
+    check_game_over  Board.can_place_any для трёх фигур — GameScreen.check_game_over
+    drag_preview     Ghost.move вдоль протяжки пальцем — BoardMixin.show_preview
+
+Печатает JSON Lines: ops/sec, нс на операцию и память. Счётчика всех
+выделений в CPython нет, поэтому «аллокации» — это tracemalloc: пик
+выделенного за прогон и число блоков, оставшихся после него.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from engine import SHAPES_DEF, SLOT_COUNT, Board, Ghost, Geometry, clear_mask, compile_shapes
+
+SIZES = (8, 10, 12)
+FILLS = (0.25, 0.5, 0.75)
+OPS = 20000
+DRAG_STEPS = 4  # событий касания на клетку при протяжке
+
+
+def random_mask(size, fill, rng):
+    """Случайное поле с заданной долей клеток; иногда с полными линиями."""
+    mask = 0
+    for i in range(size * size):
+        if rng.random() < fill:
+            mask |= 1 << i
+    geo = Geometry(size)
+    if rng.random() < 0.3:
+        mask |= rng.choice(geo.row_masks)
+    if rng.random() < 0.3:
+        mask |= rng.choice(geo.col_masks)
+    return mask
+
+
+def playable_mask(size, fill, rng):
+    """Поле без полных линий — как между ходами в игре."""
+    mask = random_mask(size, fill, rng)
+    _, cleared = clear_mask(mask, Geometry(size))
+    return mask & ~cleared
+
+
+def drag_path(size, rng, cells):
+    """Точки (gx, gy) протяжки: случайное блуждание с шагом меньше клетки."""
+    path = []
+    x, y = rng.uniform(0, size), rng.uniform(0, size)
+    while len(path) < cells * DRAG_STEPS:
+        x = min(max(x + rng.uniform(-1, 1) / DRAG_STEPS, 0), size - 0.01)
+        y = min(max(y + rng.uniform(-1, 1) / DRAG_STEPS, 0), size - 0.01)
+        path.append((int(x), int(y)))
+    return path
+
+
+def case_touch_up(size, fill, shapes, rng):
+    board = Board(size)
+    board.mask = playable_mask(size, fill, rng)
+    drops = [(rng.choice(shapes), rng.randrange(size), rng.randrange(size)) for _ in range(OPS)]
+    fits = board.fits
+
+    def run():
+        for shape, gx, gy in drops:
+            fits(shape, gx, gy)
+    return run, len(drops)
+
+
+def case_check_lines(size, fill, shapes, rng):
+    board = Board(size)
+    masks = [random_mask(size, fill, rng) for _ in range(OPS)]
+
+    def run():
+        for m in masks:
+            board.mask = m
+            board.clear_lines()
+    return run, len(masks)
+
+
+def case_check_game_over(size, fill, shapes, rng):
+    board = Board(size)
+    triples = [rng.sample(shapes, SLOT_COUNT) for _ in range(OPS)]
+    boards = [playable_mask(size, fill, rng) for _ in range(len(triples))]
+    can_place_any = board.can_place_any
+
+    def run():
+        for m, triple in zip(boards, triples):
+            board.mask = m
+            can_place_any(triple)
+    return run, len(triples)
+
+
+def case_drag_preview(size, fill, shapes, rng):
+    board = Board(size)
+    board.mask = playable_mask(size, fill, rng)
+    drags = []
+    while sum(len(p) for _, p in drags) < OPS:
+        drags.append((rng.choice(shapes), drag_path(size, rng, size)))
+    ghost = Ghost()
+
+    def run():
+        for shape, path in drags:
+            for gx, gy in path:
+                ghost.move(board, shape, gx, gy)
+            ghost.clear()
+    return run, sum(len(p) for _, p in drags)
+
+
+CASES = {
+    'touch_up': case_touch_up,
+    'check_lines': case_check_lines,
+    'check_game_over': case_check_game_over,
+    'drag_preview': case_drag_preview,
+}
+
+
+def measure(run, ops, repeat):
+    best = min(_timed(run) for _ in range(repeat))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    blocks = sys.getallocatedblocks()
+    run()
+    current, peak = tracemalloc.get_traced_memory()
+    retained = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+    return {
+        'ops': ops,
+        'ops_per_sec': round(ops / best),
+        'ns_per_op': round(best / ops * 1e9, 1),
+        'alloc_peak_bytes': peak - before,
+        'alloc_retained_blocks': retained,
+    }
+
+
+def _timed(run):
+    # Как timeit: сборщик мусора не вмешивается в замер
+    gc.disable()
+    try:
+        t = time.perf_counter()
+        run()
+        return time.perf_counter() - t
+    finally:
+        gc.enable()
+
+
+def run_all(sizes, fills, cases, repeat, seed):
+    for size in sizes:
+        shapes = compile_shapes(SHAPES_DEF, size)
+        for fill in fills:
+            for name in cases:
+                rng = random.Random('%s:%d:%s:%s' % (name, size, fill, seed))
+                run, ops = CASES[name](size, fill, shapes, rng)
+                result = {'case': name, 'size': size, 'fill': fill}
+                result.update(measure(run, ops, repeat))
+                yield result
+
+
+def compare(results, base_path):
+    """Печатает ускорение относительно сохранённого прогона (другой ветки)."""
+    with open(base_path, encoding='utf-8') as f:
+        base = {(r['case'], r['size'], r['fill']): r for r in map(json.loads, f) if 'case' in r}
+    for r in results:
+        old = base.get((r['case'], r['size'], r['fill']))
+        if old:
+            print('%-16s %2dx%-2d fill %.2f  %10d -> %10d ops/s  x%.2f' % (
+                r['case'], r['size'], r['size'], r['fill'], old['ops_per_sec'],
+                r['ops_per_sec'], r['ops_per_sec'] / old['ops_per_sec']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--fills', type=float, nargs='+', default=FILLS)
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=9)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='записать JSON Lines в файл')
+    parser.add_argument('--compare', help='сравнить с сохранённым --out')
+    args = parser.parse_args(argv)
+
+    results = list(run_all(args.sizes, args.fills, args.cases, args.repeat, args.seed))
+    lines = [json.dumps({'python': platform.python_version(), 'machine': platform.machine()})]
+    lines += [json.dumps(r) for r in results]
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    if args.compare:
+        compare(results, args.compare)
+    elif not args.out:
+        print('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    main()
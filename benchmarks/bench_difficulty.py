@@ -0,0 +1,103 @@
+"""
+Цена фоновой подстройки сложности для потока интерфейса.
+
+    python -m benchmarks.bench_difficulty
+    python -m benchmarks.bench_difficulty --budgets 0.03 0.01 --seconds 10
+
+Прогоны DifficultyTuner — чистый Python в фоновом потоке. Пока они
+держат GIL, поток интерфейса после сна (ожидания кадра) не может
+продолжить: CPython отбирает GIL у занятого потока только раз
+в sys.getswitchinterval() (5 мс), если тот не отдаёт его сам.
+
+Поток интерфейса здесь — цикл коротких снов по WAKE секунд; задержка
+пробуждения сверх WAKE и есть время, на которое кадр опоздал бы из-за
+фона. Раз в MOVE_EVERY секунд — «ход»: tuner.request() с очередного
+положения настоящей партии, как после хода или раздачи в игре.
+
+Случаи: off (подстройки нет) и по одному на каждый бюджет --budgets.
+Печатает JSON Lines: задержку пробуждения (p90/p99/max, мс) и долю
+пробуждений позже LATE.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import difficulty
+from engine import Game
+from simulate import policy_greedy
+
+WAKE = 0.001
+LATE = 0.002
+MOVE_EVERY = 0.1  # темп автоигры: фон занят большую часть времени
+
+
+def game_positions(seed, count):
+    """Положения (поле, рука, уровень) жадных партий Adventure."""
+    positions = []
+    while len(positions) < count:
+        game = Game('adventure', rng=random.Random(seed))
+        game.start()
+        prng = random.Random(seed)
+        while not game.over and len(positions) < count:
+            positions.append((game.board.mask, game.active_shapes(), game.level))
+            move = policy_greedy(game, prng)
+            if move is None:
+                break
+            game.place(*move)
+        seed += 1
+    return positions
+
+
+def probe(seconds, positions, tuner):
+    delays = []
+    k = 0
+    next_move = 0.0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        if tuner is not None and time.perf_counter() >= next_move:
+            tuner.request(*positions[k % len(positions)])
+            k += 1
+            next_move = time.perf_counter() + MOVE_EVERY
+        t = time.perf_counter()
+        time.sleep(WAKE)
+        delays.append(time.perf_counter() - t - WAKE)
+    if tuner is not None:
+        tuner.cancel()
+    delays.sort()
+
+    def q(p):
+        return round(delays[int(p * (len(delays) - 1))] * 1000, 2)
+    return {
+        'wakes': len(delays),
+        'delay_p90_ms': q(0.9),
+        'delay_p99_ms': q(0.99),
+        'delay_max_ms': q(1.0),
+        'late_pct': round(100 * sum(d > LATE for d in delays) / len(delays), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--budgets', type=float, nargs='+', default=[difficulty.TIME_BUDGET])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # Положения не повторяются: кеш тюнера не подменяет прогоны
+    positions = game_positions(args.seed, int(args.seconds / MOVE_EVERY) + 1)
+    print(json.dumps({'python': platform.python_version(), 'machine': platform.machine(),
+                      'switch_interval_ms': sys.getswitchinterval() * 1000}))
+    result = {'case': 'off'}
+    result.update(probe(args.seconds, positions, None))
+    print(json.dumps(result))
+    for budget in args.budgets:
+        result = {'case': 'tuner', 'time_budget_ms': budget * 1000}
+        result.update(probe(args.seconds, positions, difficulty.DifficultyTuner(time_budget=budget)))
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Холодный старт приложения: импорты, загрузка KV, первый кадр.
+
+    python -m benchmarks.bench_startup --runs 10
+
+Каждый прогон — отдельный процесс `python main.py`, который сам
+закрывается после первого кадра (нужен дисплей). Печатает медианы
+замеров startup_timing и полное время процесса в мс.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from startup_timing import EXIT_ENV, TIMING_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(path):
+    env = dict(os.environ, KIVY_NO_ARGS='1', KIVY_NO_CONSOLELOG='1')
+    env[TIMING_ENV] = path
+    env[EXIT_ENV] = '1'
+    t = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, 'main.py')], cwd=ROOT, env=env,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - t) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    try:
+        process_ms = [run_once(path) for _ in range(args.runs)]
+        with open(path, encoding='utf-8') as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    finally:
+        os.remove(path)
+
+    result = {'runs': len(runs), 'process_ms': round(statistics.median(process_ms), 1)}
+    for name in runs[0] if runs else ():
+        result[name + '_ms'] = round(statistics.median(r[name] for r in runs if name in r), 1)
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Цена telemetry.emit() в потоке интерфейса.
+
+    python -m benchmarks.bench_telemetry
+    python -m benchmarks.bench_telemetry --sink http://127.0.0.1:8765/
+
+Случаи:
+    disabled   телеметрия выключена (одна проверка флага)
+    ring       запись в кольцо, фоновый поток не работает
+    flushing   запись в кольцо, пока фоновый поток пишет в приёмник
+               (по умолчанию FileSink во временной папке)
+
+Печатает JSON Lines: нс на событие, сколько событий потерялось
+и укладывается ли emit() в telemetry.EVENT_BUDGET_NS. Код выхода 1,
+если бюджет превышен.
+"""
+import argparse
+import gc
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import telemetry
+
+EVENTS = 20000
+# Частота событий в flushing: примерно как при быстрой протяжке пальцем
+FLUSHING_RATE = 2000  # событий в секунду
+
+
+def emit_batch(n):
+    emit = telemetry.emit
+    for i in range(n):
+        emit(telemetry.GHOST, i & 7, i & 7, 1)
+
+
+def _timed(n):
+    gc.disable()
+    try:
+        t = time.perf_counter()
+        emit_batch(n)
+        return time.perf_counter() - t
+    finally:
+        gc.enable()
+
+
+def measure(name, repeat, n=EVENTS):
+    best = min(_timed(n) for _ in range(repeat))
+    return {'case': name, 'events': n, 'ns_per_event': round(best / n * 1e9, 1)}
+
+
+def measure_flushing(sink, seconds):
+    """Темп событий как в игре, фоновый поток пишет в приёмник; худшая пачка."""
+    telemetry.start(sink)
+    chunk = 64
+    pause = chunk / FLUSHING_RATE
+    worst = total = 0.0
+    sent = 0
+    dropped = telemetry.dropped
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        spent = _timed(chunk)
+        worst = max(worst, spent / chunk)
+        total += spent
+        sent += chunk
+        time.sleep(pause)
+    telemetry.stop()
+    return {'case': 'flushing', 'events': sent,
+            'ns_per_event': round(total / sent * 1e9, 1),
+            'worst_chunk_ns_per_event': round(worst * 1e9, 1),
+            'dropped': telemetry.dropped - dropped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=9)
+    parser.add_argument('--seconds', type=float, default=3.0, help='длительность flushing')
+    parser.add_argument('--sink', help='URL сборщика вместо FileSink')
+    args = parser.parse_args(argv)
+
+    results = [measure('disabled', args.repeat)]
+    # Кольцо без потока: включаем флаг вручную, события никуда не уходят
+    telemetry.enabled = True
+    results.append(measure('ring', args.repeat))
+    telemetry.enabled = False
+    telemetry.collect()
+
+    folder = tempfile.mkdtemp()
+    try:
+        sink = telemetry.HttpSink(args.sink) if args.sink else telemetry.FileSink(folder)
+        results.append(measure_flushing(sink, args.seconds))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    ok = True
+    print(json.dumps({'python': platform.python_version(), 'machine': platform.machine(),
+                      'budget_ns': telemetry.EVENT_BUDGET_NS}))
+    for r in results:
+        r['within_budget'] = r['ns_per_event'] <= telemetry.EVENT_BUDGET_NS
+        ok = ok and r['within_budget']
+        print(json.dumps(r))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
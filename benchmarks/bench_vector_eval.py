@@ -0,0 +1,114 @@
+"""
+Пропускная способность vector_eval.evaluate против поклеточного цикла
+из GameScreen.check_lines / check_game_over.
+
+    python -m benchmarks.bench_vector_eval --boards 5000
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from engine import GRID_SIZE, SHAPES, line_points
+import vector_eval
+
+
+def loop_check_lines(cells):
+    """Старый check_lines: cells[x][y], только подсчёт очков."""
+    lines_x, lines_y = [], []
+    for y in range(GRID_SIZE):
+        if all(cells[x][y] for x in range(GRID_SIZE)):
+            lines_y.append(y)
+    for x in range(GRID_SIZE):
+        if all(cells[x][y] for y in range(GRID_SIZE)):
+            lines_x.append(x)
+    return lines_y, lines_x, (len(lines_x) + len(lines_y)) * 10
+
+
+def loop_shape_fits(cells, shape):
+    """Старый внутренний цикл check_game_over для одной фигуры."""
+    for x in range(GRID_SIZE):
+        for y in range(GRID_SIZE):
+            fits = True
+            for bx, by in shape.coords:
+                gx, gy = x + bx, y + by
+                if not (0 <= gx < GRID_SIZE and 0 <= gy < GRID_SIZE):
+                    fits = False; break
+                if cells[gx][gy]:
+                    fits = False; break
+            if fits: return True
+    return False
+
+
+def random_boards(n, rng):
+    boards = np.zeros((n, GRID_SIZE, GRID_SIZE), dtype=np.uint8)
+    for i in range(n):
+        fill = rng.random()
+        for y in range(GRID_SIZE):
+            for x in range(GRID_SIZE):
+                boards[i, y, x] = rng.random() < fill
+        # Немного гарантированно полных линий
+        if rng.random() < 0.3:
+            boards[i, rng.randrange(GRID_SIZE), :] = 1
+        if rng.random() < 0.3:
+            boards[i, :, rng.randrange(GRID_SIZE)] = 1
+    return boards
+
+
+def to_cells(board):
+    return [[bool(board[y, x]) for y in range(GRID_SIZE)] for x in range(GRID_SIZE)]
+
+
+def run_loop(all_cells):
+    for cells in all_cells:
+        loop_check_lines(cells)
+        for shape in SHAPES:
+            loop_shape_fits(cells, shape)
+
+
+def verify(boards, result):
+    """Замер имеет смысл, только если ответы совпали с циклом (тот же разбор — в tests)."""
+    for i, board in enumerate(boards):
+        cells = to_cells(board)
+        rows, cols, points = loop_check_lines(cells)
+        if (list(np.flatnonzero(result.rows_full[i])) != rows
+                or list(np.flatnonzero(result.cols_full[i])) != cols
+                or not result.points[i] == points == line_points(len(rows) + len(cols))):
+            raise RuntimeError("Доска %d: линии не совпали с циклом" % i)
+        for k, shape in enumerate(SHAPES):
+            if bool(result.fits[i, k]) != loop_shape_fits(cells, shape):
+                raise RuntimeError("Доска %d, фигура %d: влезаемость не совпала" % (i, shape.id))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--boards', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    boards = random_boards(args.boards, random.Random(args.seed))
+    packed = vector_eval.pack(boards)
+    verify(boards, vector_eval.evaluate(boards))
+    verify(boards, vector_eval.evaluate(packed))
+
+    all_cells = [to_cells(b) for b in boards]
+    t = time.perf_counter()
+    run_loop(all_cells)
+    loop_time = time.perf_counter() - t
+
+    t = time.perf_counter()
+    vector_eval.evaluate(packed)
+    vec_time = time.perf_counter() - t
+
+    print(json.dumps({
+        'boards': args.boards,
+        'loop_boards_per_sec': round(args.boards / loop_time),
+        'numpy_boards_per_sec': round(args.boards / vec_time),
+        'speedup': round(loop_time / vec_time, 1),
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+«Честная» раздача: только такие тройки фигур, которые можно поставить все.
+
+Тройка тянется из обычного распределения каталога (веса фигур), и если
+её нельзя уложить ни в каком порядке — тянется заново. Так частоты
+фигур сохраняются, просто с условием «тройка решаема».
+
+Решаемость проверяется поиском в глубину по маскам установки
+с выходом на первом успехе и LRU-кешем (поле, фигуры) -> да/нет.
+Фигуры, которые не влезают на поле вообще, отсекаются до выборки.
+Бюджет в узлах — один на всю раздачу, на все попытки сразу: кончился —
+раздаются самые маленькие фигуры. Так одна раздача не дороже
+NODE_BUDGET узлов, сколько бы троек ни оказалось нерешаемыми.
+
+Раздача должна повторяться по сиду (реплеи), поэтому попадание в кеш
+списывает с бюджета столько узлов, сколько стоил исходный поиск:
+итог не зависит от того, что уже лежит в кеше.
+"""
+from collections import OrderedDict
+
+from engine import GRID_SIZE, SLOT_COUNT, Geometry, RandomDealer, clear_after
+
+ATTEMPTS = 24
+NODE_BUDGET = 150  # на всю раздачу: ~0.5 мс на десктопе, ~2 мс на слабом телефоне
+CACHE_SIZE = 50000
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+class FairDealer(RandomDealer):
+    def __init__(self, shapes=None, size=GRID_SIZE, attempts=ATTEMPTS,
+                 node_budget=NODE_BUDGET, cache_size=CACHE_SIZE):
+        super().__init__(shapes)
+        self.geo = Geometry(size)
+        self.attempts = attempts
+        self.node_budget = node_budget
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self._nodes = 0
+
+    def deal(self, board_mask, rng):
+        weights = self.weights or [s.weight for s in self.shapes]
+        fitting = [(s, w) for s, w in zip(self.shapes, weights) if s.fits_anywhere(board_mask)]
+        if not fitting:
+            # Ничего не влезает — игра всё равно окончена
+            return super().deal(board_mask, rng)
+        fitting, weights = [s for s, _ in fitting], [w for _, w in fitting]
+
+        self._nodes = 0
+        try:
+            for _ in range(self.attempts):
+                triple = rng.choices(fitting, weights, k=SLOT_COUNT)
+                if self._check(board_mask, triple):
+                    return triple
+        except _OutOfBudget:
+            pass
+        # Не повезло с выборкой или кончился бюджет: самые маленькие из подходящих фигур
+        smallest = min(fitting, key=lambda s: s.count)
+        return [smallest] * SLOT_COUNT
+
+    def solvable(self, board_mask, shapes):
+        """Можно ли поставить все фигуры в каком-нибудь порядке (свой бюджет)."""
+        self._nodes = 0
+        try:
+            return self._check(board_mask, shapes)
+        except _OutOfBudget:
+            return False
+
+    def _check(self, board_mask, shapes):
+        # Крупные фигуры первыми: их место найти труднее
+        items = tuple(sorted(shapes, key=lambda s: (-s.count, s.id)))
+        return self._solvable(board_mask, items)
+
+    def _solvable(self, mask, items):
+        if len(items) == 1:
+            return items[0].fits_anywhere(mask)
+        key = (mask, tuple(s.id for s in items))
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.cache.move_to_end(key)
+            result, cost = hit
+            self._nodes += cost
+            if self._nodes > self.node_budget:
+                raise _OutOfBudget
+            return result
+
+        start = self._nodes
+        result = False
+        tried = set()
+        for pos, shape in enumerate(items):
+            if shape.id in tried:
+                continue
+            tried.add(shape.id)
+            rest = items[:pos] + items[pos + 1:]
+            for m in shape.masks:
+                if m & mask:
+                    continue
+                self._nodes += 1
+                if self._nodes > self.node_budget:
+                    raise _OutOfBudget
+                new_mask = mask | m
+                _, cleared = clear_after(new_mask, m, self.geo)
+                if self._solvable(new_mask & ~cleared, rest):
+                    result = True
+                    break
+            if result:
+                break
+
+        self.cache[key] = (result, self._nodes - start)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
@@ -0,0 +1,159 @@
+"""
+Подстройка сложности Adventure по оценке Монте-Карло.
+
+Между ходами фоновый поток разыгрывает с текущего поля короткие
+партии-прогоны: доставить фигуры из руки, затем ROLLOUT_DEALS новых
+раздач с текущими весами, ходы — быстрая жадная политика на масках.
+Доля доживших прогонов — оценка шанса выжить. Она сравнивается с целью
+уровня (target_survival), и наклон раздачи tilt (engine.tilted_weights)
+сдвигается к цели: выживают реже цели — чаще мелкие фигуры, и наоборот.
+
+У прогонов жёсткий бюджет времени (TIME_BUDGET), новый ход или касание
+фигуры отменяют незаконченную оценку. После каждого прогона (доли
+миллисекунды) поток отдаёт GIL: иначе интерфейс ждал бы его до
+sys.getswitchinterval() (5 мс) на каждом пробуждении, пока идёт оценка
+(замер — benchmarks/bench_difficulty.py). В практике подстройки нет:
+отменённый и сделанный заново ход должен получить ту же раздачу. Оценки кешируются по сигнатуре
+(поле, фигуры в руке, наклон), так что повторные положения бесплатны.
+
+Поток интерфейса только читает tuner.tilt перед раздачей; реплей
+записывает наклон каждой раздачи, поэтому партия повторяется по сиду.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from engine import GRID_SIZE, SHAPES, SLOT_COUNT, Geometry, clear_after, tilted_weights
+
+TIME_BUDGET = 0.03
+MAX_ROLLOUTS = 200
+MIN_ROLLOUTS = 16  # меньше прогонов за бюджет — оценку используем, но не кешируем
+ROLLOUT_DEALS = 2
+GAIN = 0.3
+MAX_TILT = 1.0
+TILT_UNITS = 100  # реплей хранит наклон в сотых
+CACHE_SIZE = 4096
+
+
+def target_survival(level):
+    """Желаемый шанс пережить ближайшие раздачи: с уровнем всё ниже."""
+    return max(0.5, 0.9 - 0.05 * (level - 1))
+
+
+def quantize(tilt):
+    """Наклон в сотых — ровно то значение, что потом прочтёт реплей."""
+    return round(max(-MAX_TILT, min(MAX_TILT, tilt)) * TILT_UNITS) / TILT_UNITS
+
+
+def _place_greedy(mask, shape, geo):
+    """Ход прогона: больше всего линий, при равенстве — первое место. None — некуда."""
+    best, best_lines = None, -1
+    for _, _, m in shape.legal_placements(mask):
+        new_mask = mask | m
+        lines, cleared = clear_after(new_mask, m, geo)
+        if lines > best_lines:
+            best, best_lines = new_mask & ~cleared, lines
+            if lines:
+                break
+    return best
+
+
+def rollout(mask, hand, shapes, weights, geo, rng, deals=ROLLOUT_DEALS):
+    """Один прогон: True, если удалось поставить руку и ещё deals раздач."""
+    pieces = sorted(hand, key=lambda s: -s.count)
+    for deal in range(deals + 1):
+        if deal:
+            pieces = sorted(rng.choices(shapes, weights, k=SLOT_COUNT), key=lambda s: -s.count)
+        for shape in pieces:
+            mask = _place_greedy(mask, shape, geo)
+            if mask is None:
+                return False
+    return True
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class DifficultyTuner:
+    def __init__(self, shapes=None, size=GRID_SIZE, time_budget=TIME_BUDGET):
+        self.shapes = shapes if shapes is not None else SHAPES
+        self.geo = Geometry(size)
+        self.time_budget = time_budget
+        self.tilt = 0.0
+        self.cache = OrderedDict()
+        self.rng = random.Random()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.job = None
+        self.generation = 0
+        self.thread = None
+
+    # --- ПОТОК ИНТЕРФЕЙСА ---
+
+    def reset(self, tilt=0.0):
+        """Новая партия."""
+        self.cancel()
+        self.tilt = quantize(tilt)
+
+    def request(self, mask, hand, level):
+        """Оценить положение в фоне (предыдущая оценка отменяется)."""
+        with self.lock:
+            self.generation += 1
+            self.job = (self.generation, mask, tuple(hand), level, self.tilt)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='difficulty', daemon=True)
+            self.thread.start()
+        self.wake.set()
+
+    def cancel(self):
+        """Игрок двигает фигуру: незаконченная оценка больше не нужна."""
+        with self.lock:
+            self.generation += 1
+            self.job = None
+
+    # --- ФОНОВЫЙ ПОТОК ---
+
+    def _run(self):
+        while True:
+            self.wake.wait()
+            with self.lock:
+                self.wake.clear()
+                job, self.job = self.job, None
+            if job is None:
+                continue
+            try:
+                survival = self.estimate(*job)
+            except _Cancelled:
+                continue
+            generation, _, _, level, tilt = job
+            with self.lock:
+                if generation == self.generation:
+                    self.tilt = quantize(tilt + GAIN * (target_survival(level) - survival))
+
+    def estimate(self, generation, mask, hand, level, tilt):
+        """Доля доживших прогонов; с кешем по (поле, рука, наклон)."""
+        key = (mask, tuple(s.id for s in hand), tilt)
+        survival = self.cache.get(key)
+        if survival is not None:
+            self.cache.move_to_end(key)
+            return survival
+
+        weights = tilted_weights(self.shapes, tilt) or [1] * len(self.shapes)
+        deadline = time.perf_counter() + self.time_budget
+        alive = runs = 0
+        while runs < MAX_ROLLOUTS:
+            if generation != self.generation:
+                raise _Cancelled
+            if runs and time.perf_counter() > deadline:
+                break
+            alive += rollout(mask, hand, self.shapes, weights, self.geo, self.rng)
+            runs += 1
+            time.sleep(0)  # отдать GIL потоку интерфейса
+        survival = alive / runs
+        if runs >= MIN_ROLLOUTS:
+            self.cache[key] = survival
+            if len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return survival
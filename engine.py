@@ -0,0 +1,476 @@
+"""
+Безголовый движок игры (без Kivy).
+
+Поле хранится одним целым числом: бит (y * size + x) = занятая клетка.
+Цвета лежат рядом в bytearray (индекс в COLOR_NAMES, 0 = пусто).
+Фигуры заранее переводятся в битовые маски, поэтому установка,
+поиск линий и подсчёт очков делаются побитовыми операциями.
+
+Размер поля и каталог фигур можно заменить JSON-файлом
+(BLOCK_PUZZLE_CONFIG=configs/pentomino.json), см. load_config.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+
+# --- КОНФИГУРАЦИЯ ---
+DEFAULT_GRID_SIZE = 8
+SLOT_COUNT = 3
+LINE_POINTS = 10
+START_TARGET = 100
+TARGET_FACTOR = 1.5
+TILT_SCALE = 3.0  # при |tilt| = 1 самая мелкая фигура выпадает в e^3 раз чаще крупной
+CONFIG_ENV = 'BLOCK_PUZZLE_CONFIG'
+
+# Цвета фигур (rgba)
+DEFAULT_PALETTE = {
+    'blue':   (0.2, 0.6, 1.0, 1),
+    'green':  (0.2, 0.8, 0.4, 1),
+    'red':    (0.9, 0.3, 0.3, 1),
+    'yellow': (0.9, 0.8, 0.2, 1),
+    'purple': (0.6, 0.3, 0.9, 1),
+    'orange': (1.0, 0.5, 0.0, 1),
+    'cyan':   (0.2, 0.9, 0.9, 1),
+}
+
+SHAPES_DEF = [
+    {'coords': [(0, 0)], 'color': 'blue'},
+    {'coords': [(0, 0), (1, 0)], 'color': 'green'},
+    {'coords': [(0, 0), (0, 1)], 'color': 'green'},
+    {'coords': [(0, 0), (1, 0), (2, 0)], 'color': 'red'},
+    {'coords': [(0, 0), (0, 1), (0, 2)], 'color': 'red'},
+    {'coords': [(0, 0), (1, 0), (0, 1), (1, 1)], 'color': 'yellow'},
+    {'coords': [(0, 0), (1, 0), (2, 0), (2, 1)], 'color': 'orange'},
+    {'coords': [(0, 0), (1, 0), (2, 0), (0, 1)], 'color': 'orange'},
+    {'coords': [(0, 0), (1, 0), (1, 1)], 'color': 'purple'},
+    {'coords': [(0, 0), (1, 0), (2, 0), (1, 1)], 'color': 'cyan'},
+]
+
+
+def load_config(path=None):
+    """
+    (размер поля, палитра, описания фигур) из JSON:
+    {"grid_size": 10, "colors": {"blue": [0.2, 0.6, 1, 1]}, "shapes": [{"coords": [[0, 0]], "color": "blue"}]}
+    Любой ключ можно опустить — возьмётся значение по умолчанию.
+    У фигуры может быть "weight" — относительная частота выпадения (по умолчанию 1).
+    Без пути берётся файл из переменной окружения BLOCK_PUZZLE_CONFIG.
+    """
+    path = path or os.environ.get(CONFIG_ENV)
+    if not path:
+        return DEFAULT_GRID_SIZE, dict(DEFAULT_PALETTE), SHAPES_DEF
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    palette = dict(DEFAULT_PALETTE)
+    palette.update((name, tuple(rgba)) for name, rgba in data.get('colors', {}).items())
+    return data.get('grid_size', DEFAULT_GRID_SIZE), palette, data.get('shapes', SHAPES_DEF)
+
+
+GRID_SIZE, PALETTE, _SHAPES_CONFIG = load_config()
+
+# Индекс 0 — пустая клетка
+COLOR_NAMES = (None,) + tuple(PALETTE)
+COLOR_IDS = {name: i for i, name in enumerate(COLOR_NAMES) if name}
+
+
+class Geometry:
+    """
+    Маски строк и столбцов для поля size x size (кешируются по размеру).
+    touching — кеш «маска фигуры -> линии, которые она задевает».
+    """
+    __slots__ = ('size', 'cells', 'full', 'row_masks', 'col_masks', 'touching')
+    _cache = {}
+
+    def __new__(cls, size=GRID_SIZE):
+        geo = cls._cache.get(size)
+        if geo is None:
+            geo = super().__new__(cls)
+            geo.size = size
+            geo.cells = size * size
+            geo.full = (1 << geo.cells) - 1
+            row = (1 << size) - 1
+            geo.row_masks = tuple(row << (y * size) for y in range(size))
+            col = 0
+            for y in range(size):
+                col |= 1 << (y * size)
+            geo.col_masks = tuple(col << x for x in range(size))
+            geo.touching = {}
+            cls._cache[size] = geo
+        return geo
+
+
+class Shape:
+    """
+    Фигура каталога, скомпилированная один раз и неизменяемая.
+    coords — клетки, width/height — габариты, count — число клеток,
+    mask — маска в начале координат, rgba — цвет для отрисовки.
+    placements — таблица всех допустимых точек (gx, gy, маска),
+    masks — те же маски отдельным кортежем для быстрых проверок.
+    """
+    __slots__ = ('id', 'coords', 'color', 'color_id', 'rgba', 'width', 'height', 'count',
+                 'weight', 'size', 'mask', 'placements', 'masks')
+
+    def __init__(self, shape_id, coords, color, size=GRID_SIZE, palette=None, weight=1):
+        coords = tuple((int(c[0]), int(c[1])) for c in coords)
+        if not coords or min(c[0] for c in coords) < 0 or min(c[1] for c in coords) < 0:
+            raise ValueError("Фигура %d: координаты должны быть неотрицательными" % shape_id)
+        width = max(c[0] for c in coords) + 1
+        height = max(c[1] for c in coords) + 1
+        if width > size or height > size:
+            raise ValueError("Фигура %d не помещается на поле %dx%d" % (shape_id, size, size))
+        mask = 0
+        for bx, by in coords:
+            mask |= 1 << (by * size + bx)
+        placements = tuple(
+            (gx, gy, mask << (gy * size + gx))
+            for gy in range(size - height + 1)
+            for gx in range(size - width + 1)
+        )
+        fields = {
+            'id': shape_id, 'coords': coords, 'color': color, 'color_id': COLOR_IDS[color],
+            'rgba': tuple((palette or PALETTE)[color]), 'width': width, 'height': height,
+            'count': len(coords), 'weight': weight, 'size': size, 'mask': mask,
+            'placements': placements, 'masks': tuple(p[2] for p in placements),
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Shape неизменяема")
+
+    def __delattr__(self, name):
+        raise AttributeError("Shape неизменяема")
+
+    def __repr__(self):
+        return 'Shape(%d, %r, %r)' % (self.id, self.coords, self.color)
+
+    def mask_at(self, gx, gy, size=None):
+        """Маска фигуры в точке (gx, gy) или 0, если она вылезает за поле."""
+        size = size or self.size
+        if gx < 0 or gy < 0 or gx + self.width > size or gy + self.height > size:
+            return 0
+        return self.mask << (gy * size + gx)
+
+    def fits_anywhere(self, board_mask):
+        for m in self.masks:
+            if not m & board_mask:
+                return True
+        return False
+
+    def legal_placements(self, board_mask):
+        """Все (gx, gy, маска), куда фигура встаёт на поле board_mask."""
+        return [p for p in self.placements if not p[2] & board_mask]
+
+
+def compile_shapes(shapes_def, size=GRID_SIZE, palette=None):
+    return [Shape(i, d['coords'], d['color'], size, palette, d.get('weight', 1))
+            for i, d in enumerate(shapes_def)]
+
+
+def shape_weights(shapes):
+    """Веса для rng.choices или None, если все фигуры равновероятны."""
+    weights = [s.weight for s in shapes]
+    return None if len(set(weights)) <= 1 else weights
+
+
+def tilted_weights(shapes, tilt):
+    """
+    Веса каталога со сдвигом сложности: tilt > 0 — чаще мелкие фигуры
+    (легче), tilt < 0 — чаще крупные. При tilt == 0 — как shape_weights.
+    """
+    if not tilt:
+        return shape_weights(shapes)
+    counts = [s.count for s in shapes]
+    mean = sum(counts) / len(counts)
+    spread = (max(counts) - min(counts)) or 1
+    return [s.weight * math.exp(TILT_SCALE * tilt * (mean - s.count) / spread) for s in shapes]
+
+
+def catalog_hash(shapes, size=GRID_SIZE):
+    """
+    8 байт отпечатка каталога: реплей годится только для того же поля,
+    фигур и частот раздачи. Вес 1 в отпечаток не пишется, чтобы старые
+    сохранения и реплеи каталогов без весов оставались годными.
+    """
+    data = json.dumps([size, [[s.coords, s.color] + ([s.weight] if s.weight != 1 else [])
+                              for s in shapes]])
+    return hashlib.sha1(data.encode('utf-8')).digest()[:8]
+
+
+def new_seed():
+    """Случайный сид для новой партии (63 бита)."""
+    return random.SystemRandom().getrandbits(63)
+
+
+SHAPES = compile_shapes(_SHAPES_CONFIG)
+CATALOG_HASH = catalog_hash(SHAPES)
+# Самая большая фигура каталога — по ней виджеты заводят пулы графики
+MAX_SHAPE_CELLS = max(s.count for s in SHAPES)
+
+
+def iter_bits(mask):
+    """Индексы установленных битов по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def line_points(lines):
+    return lines * LINE_POINTS
+
+
+def full_lines(mask, geo):
+    """Номера заполненных строк (y) и столбцов (x) для маски поля."""
+    rows = [y for y, rm in enumerate(geo.row_masks) if mask & rm == rm]
+    cols = [x for x, cm in enumerate(geo.col_masks) if mask & cm == cm]
+    return rows, cols
+
+
+def clear_after(mask, placed, geo):
+    """
+    То же, что clear_mask, но сразу после хода: полными могут стать только
+    линии под фигурой placed (check_lines не оставляет полных линий на поле).
+    """
+    touched = geo.touching.get(placed)
+    if touched is None:
+        touched = tuple(lm for lm in geo.row_masks + geo.col_masks if lm & placed)
+        geo.touching[placed] = touched
+    lines = 0
+    cleared = 0
+    for lm in touched:
+        if mask & lm == lm:
+            lines += 1
+            cleared |= lm
+    return lines, cleared
+
+
+def clear_mask(mask, geo):
+    """Маска клеток, которые уйдут вместе с полными линиями, и число линий."""
+    cleared = 0
+    lines = 0
+    for rm in geo.row_masks:
+        if mask & rm == rm:
+            cleared |= rm
+            lines += 1
+    for cm in geo.col_masks:
+        if mask & cm == cm:
+            cleared |= cm
+            lines += 1
+    return lines, cleared
+
+
+class Board:
+    """Поле: маска занятости + массив цветов."""
+    __slots__ = ('geo', 'size', 'mask', 'colors')
+
+    def __init__(self, size=GRID_SIZE):
+        self.geo = Geometry(size)
+        self.size = size
+        self.mask = 0
+        self.colors = bytearray(size * size)
+
+    def clear(self):
+        self.mask = 0
+        self.colors[:] = bytes(len(self.colors))
+
+    def is_filled(self, x, y):
+        return (self.mask >> (y * self.size + x)) & 1 == 1
+
+    def color_at(self, x, y):
+        return COLOR_NAMES[self.colors[y * self.size + x]]
+
+    def fits(self, shape, gx, gy):
+        m = shape.mask_at(gx, gy, self.size)
+        return m != 0 and not (m & self.mask)
+
+    def place(self, shape, gx, gy):
+        """Ставит фигуру. Возвращает маску новых клеток или 0, если нельзя."""
+        m = shape.mask_at(gx, gy, self.size)
+        if not m or m & self.mask:
+            return 0
+        self.mask |= m
+        colors = self.colors
+        for i in iter_bits(m):
+            colors[i] = shape.color_id
+        return m
+
+    def full_lines(self):
+        """Номера заполненных строк (y) и столбцов (x)."""
+        return full_lines(self.mask, self.geo)
+
+    def clear_lines(self):
+        """Убирает полные линии. Возвращает (число линий, маска очищенных клеток)."""
+        lines, cleared = clear_mask(self.mask, self.geo)
+        if not lines:
+            return 0, 0
+        self.mask &= ~cleared
+        colors = self.colors
+        for i in iter_bits(cleared):
+            colors[i] = 0
+        return lines, cleared
+
+    def can_place_any(self, shapes):
+        """Влезает ли хоть одна из фигур хоть куда-нибудь."""
+        mask = self.mask
+        for shape in shapes:
+            for m in shape.masks:
+                if not m & mask:
+                    return True
+        return False
+
+    def copy(self):
+        other = Board(self.size)
+        other.mask = self.mask
+        other.colors[:] = self.colors
+        return other
+
+
+class Ghost:
+    """
+    Призрак фигуры под пальцем: маска клеток + ключ (фигура, точка, поле).
+    move() говорит, какие клетки стереть и какие покрасить, чтобы при
+    движении пальца перерисовывать только изменившиеся.
+    """
+    __slots__ = ('mask', 'key', 'ok')
+
+    def __init__(self):
+        self.mask = 0
+        self.key = None
+        self.ok = False
+
+    def clear(self):
+        """Убирает призрака. Возвращает маску клеток, которые надо стереть."""
+        old = self.mask
+        self.mask = 0
+        self.key = None
+        self.ok = False
+        return old
+
+    def move(self, board, shape, gx, gy):
+        """Возвращает (стереть, покрасить) — маски клеток."""
+        key = (shape.id, gx, gy, board.mask)
+        if key == self.key:
+            return 0, 0
+        ok = board.fits(shape, gx, gy)
+        new = shape.mask_at(gx, gy, board.size) if ok else 0
+        old = self.mask
+        # Другая фигура — другой цвет, тогда перекрашиваем и общие клетки
+        same_shape = self.key is not None and self.key[0] == shape.id
+        erase = old & ~new
+        paint = new & ~old if same_shape else new
+        self.mask = new
+        self.key = key
+        self.ok = ok
+        return erase, paint
+
+
+class RandomDealer:
+    """Раздача как всегда: три независимые фигуры (с весами каталога, если они заданы)."""
+
+    def __init__(self, shapes=None):
+        self.shapes = shapes if shapes is not None else SHAPES
+        self.tilt = 0.0
+        self.weights = shape_weights(self.shapes)
+
+    def set_tilt(self, tilt):
+        """Сдвиг сложности следующих раздач (см. tilted_weights и difficulty.py)."""
+        self.tilt = tilt
+        self.weights = tilted_weights(self.shapes, tilt)
+
+    def deal(self, board_mask, rng):
+        if self.weights is None:
+            return [rng.choice(self.shapes) for _ in range(SLOT_COUNT)]
+        return rng.choices(self.shapes, self.weights, k=SLOT_COUNT)
+
+
+class Game:
+    """
+    Партия целиком: поле, три слота, очки и прогресс Adventure.
+    Повторяет правила GameScreen, но без задержек Clock и виджетов.
+    С auto_level=False переход уровня делает только вызов level_up()
+    (так реплей повторяет момент, когда он случился в интерфейсе).
+    """
+
+    def __init__(self, mode='classic', rng=None, shapes=None, size=GRID_SIZE,
+                 target_score=START_TARGET, auto_level=True, dealer=None):
+        self.mode = mode
+        self.rng = rng if rng is not None else random.Random()
+        self.shapes = shapes if shapes is not None else SHAPES
+        self.dealer = dealer if dealer is not None else RandomDealer(self.shapes)
+        self.board = Board(size)
+        self.slots = [None] * SLOT_COUNT
+        self.score = 0
+        self.target_score = target_score
+        self.auto_level = auto_level
+        self.level = 1
+        self.moves = 0
+        self.lines = 0
+        self.total_score = 0
+        self.over = False
+
+    def start(self):
+        self.board.clear()
+        self.score = 0
+        self.moves = 0
+        self.lines = 0
+        self.total_score = 0
+        self.over = False
+        self.slots = [None] * SLOT_COUNT
+        self.spawn()
+
+    def spawn(self):
+        self.slots = list(self.dealer.deal(self.board.mask, self.rng))
+        self.check_game_over()
+
+    def active_shapes(self):
+        return [s for s in self.slots if s is not None]
+
+    def legal_moves(self):
+        """Все ходы (слот, gx, gy, маска) на текущем поле."""
+        mask = self.board.mask
+        return [(i, gx, gy, m)
+                for i, shape in enumerate(self.slots) if shape is not None
+                for gx, gy, m in shape.legal_placements(mask)]
+
+    def check_game_over(self):
+        active = self.active_shapes()
+        if active and not self.board.can_place_any(active):
+            self.over = True
+        return self.over
+
+    def place(self, slot, gx, gy):
+        """
+        Ход: слот + точка на поле. Возвращает очки за ход
+        или None, если фигуру туда поставить нельзя.
+        """
+        shape = self.slots[slot]
+        if shape is None or self.over or not self.board.place(shape, gx, gy):
+            return None
+        self.slots[slot] = None
+        self.moves += 1
+        lines, _ = self.board.clear_lines()
+        self.lines += lines
+        points = line_points(lines) + shape.count
+        self.score += points
+        self.total_score += points
+
+        if self.auto_level and self.level_reached():
+            self.level_up()
+        elif not self.active_shapes():
+            self.spawn()
+        else:
+            self.check_game_over()
+        return points
+
+    def level_reached(self):
+        return self.mode == 'adventure' and self.score >= self.target_score
+
+    def level_up(self):
+        self.target_score = int(self.target_score * TARGET_FACTOR)
+        self.level += 1
+        self.score = 0
+        self.over = False
+        self.board.clear()
+        self.spawn()
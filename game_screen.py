@@ -0,0 +1,1233 @@
+"""
+Игровой экран и его виджеты.
+
+Модуль тяжёлый (виджеты поля, Popup, движок, решатель), поэтому main.py
+импортирует его только при первом переходе из меню в игру.
+"""
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from kivy.app import App
+from kivy.lang import Builder
+from kivy.uix.widget import Widget
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.anchorlayout import AnchorLayout
+from kivy.uix.label import Label
+from kivy.uix.button import Button
+from kivy.uix.popup import Popup
+from kivy.uix.screenmanager import Screen
+from kivy.core.window import Window
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.properties import NumericProperty, StringProperty, BooleanProperty, ColorProperty
+from kivy.graphics import Color, RoundedRectangle, InstructionGroup, PushMatrix, PopMatrix, Translate
+
+import profiling
+import snapshot
+import telemetry
+from dealer import FairDealer
+from difficulty import DifficultyTuner
+from history import History, Position
+from engine import (CATALOG_HASH, COLOR_NAMES, GRID_SIZE, MAX_SHAPE_CELLS, PALETTE, SHAPES,
+                    START_TARGET, TARGET_FACTOR, Board, Ghost, RandomDealer, clear_mask, iter_bits, line_points,
+                    new_seed)
+from replay import EXTENSION as REPLAY_EXTENSION, ReplayWriter
+from solver import HINT_BUDGET, Solver
+
+# --- КОНФИГУРАЦИЯ ---
+GAP = dp(2)
+MAX_REPLAYS = 100
+HINT_SECONDS = 1.0
+AUTOPLAY_INTERVAL = 0.4
+CLEAR_EFFECT_TIME = 0.3
+SLOT_LAYOUT_CACHE = 64
+
+# ЦВЕТА (Плоские, яркие, как в первой версии)
+COLORS = {
+    'bg':         (0.1, 0.1, 0.15, 1),
+    'panel':      (0.15, 0.15, 0.22, 1),
+    'grid_empty': (0.2, 0.2, 0.25, 1),
+    'text':       (0.9, 0.9, 0.9, 1),
+}
+# Цвета фигур — из палитры каталога (engine / BLOCK_PUZZLE_CONFIG)
+COLORS.update(PALETTE)
+
+# Вид клетки для BoardMixin.flush: EMPTY_VIEW, id цвета блока или GHOST_VIEW + id цвета
+EMPTY_VIEW = 0
+GHOST_VIEW = 0x100
+GHOST_ALPHA = 0.4
+
+
+# --- KV STYLES (Минимализм) ---
+# Правила игрового экрана; меню и общие стили — в main.py
+KV = """
+#:import hex kivy.utils.get_color_from_hex
+
+<GameCell>:
+    canvas:
+        Color:
+            rgba: self.display_color
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: [dp(3)]
+
+<GameBoard,CanvasBoard>:
+    canvas.before:
+        Color:
+            rgba: 0.15, 0.15, 0.22, 1
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: [dp(5)]
+
+<GameScreen>:
+    canvas.before:
+        Color:
+            rgba: 0.1, 0.1, 0.15, 1
+        Rectangle:
+            pos: self.pos
+            size: self.size
+
+    BoxLayout:
+        orientation: 'vertical'
+        padding: dp(10)
+        spacing: dp(10)
+
+        # Header
+        BoxLayout:
+            size_hint_y: 0.1
+            Label:
+                text: root.score_text
+                font_size: dp(24)
+                bold: True
+                color: 1, 1, 1, 1
+            Button:
+                text: "UNDO"
+                size_hint_x: 0.25 if root.practice else 0
+                opacity: 1 if root.practice else 0
+                disabled: not root.can_undo
+                background_normal: ''
+                background_color: 0.3, 0.3, 0.4, 1
+                on_release: root.undo()
+            Button:
+                text: "REDO"
+                size_hint_x: 0.25 if root.practice else 0
+                opacity: 1 if root.practice else 0
+                disabled: not root.can_redo
+                background_normal: ''
+                background_color: 0.3, 0.3, 0.4, 1
+                on_release: root.redo()
+            Button:
+                text: "HINT"
+                size_hint_x: 0.25
+                background_normal: ''
+                background_color: 0.3, 0.3, 0.4, 1
+                on_release: root.show_hint()
+            Button:
+                text: "AUTO" if not root.autoplay else "STOP"
+                size_hint_x: 0.25
+                background_normal: ''
+                background_color: (0.3, 0.3, 0.4, 1) if not root.autoplay else (0.2, 0.6, 1, 1)
+                on_release: root.toggle_autoplay()
+            Button:
+                text: "MENU"
+                size_hint_x: 0.3
+                background_normal: ''
+                background_color: 0.3, 0.3, 0.4, 1
+                on_release: root.go_to_menu()
+
+        # Board
+        AnchorLayout:
+            id: board_container
+            size_hint_y: 0.6
+
+        # Slots
+        GridLayout:
+            id: spawn_grid
+            cols: 3
+            size_hint_y: 0.3
+            padding: dp(5)
+            spacing: dp(5)
+"""
+Builder.load_string(KV)
+
+def view_rgba(view):
+    """Цвет клетки для вида из BoardMixin.flush"""
+    if view == EMPTY_VIEW:
+        return COLORS['grid_empty']
+    if view < GHOST_VIEW:
+        return COLORS[COLOR_NAMES[view]]
+    c = COLORS[COLOR_NAMES[view - GHOST_VIEW]]
+    # Призрак — тот же цвет, только полупрозрачный
+    return (c[0], c[1], c[2], GHOST_ALPHA)
+
+class GameCell(Widget):
+    """
+    Клетка поля. 
+    display_color меняется для отображения блока или призрака.
+    """
+    display_color = ColorProperty(COLORS['grid_empty'])
+
+    def paint(self, rgba):
+        """Итоговый вид клетки за кадр (зовёт только BoardMixin.flush)"""
+        self.display_color = rgba
+
+class SingleBlockGraphic:
+    """Простой квадрат для отрисовки внутри DragWidget и SlotWidget"""
+    def __init__(self, canvas):
+        self.canvas = canvas
+        with self.canvas:
+            self.color = Color(0, 0, 0, 0)
+            self.rect = RoundedRectangle(pos=(0, 0), size=(0, 0), radius=[dp(3)])
+    
+    def update(self, pos, size, rgba):
+        self.rect.pos = pos
+        self.rect.size = size
+        self.color.rgba = rgba
+        
+    def hide(self):
+        self.color.rgba = (0, 0, 0, 0)
+
+class DragWidget(Widget):
+    """
+    Виджет, следующий за пальцем.
+    Блоки раскладываются один раз в activate() относительно (0, 0),
+    а при движении пальца двигается только Translate всего холста.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.canvas.before:
+            PushMatrix()
+            self.translate = Translate(-5000, -5000)
+        with self.canvas.after:
+            PopMatrix()
+        self.blocks = []
+        for _ in range(MAX_SHAPE_CELLS):
+            self.blocks.append(SingleBlockGraphic(self.canvas))
+
+        self.cell_size = 0
+        self.active = False
+        self.visible_blocks = 0
+        # Смещение фигуры от пальца и её левый нижний угол на экране
+        self.offset_x = 0
+        self.offset_y = 0
+        self.shape_x = -5000
+        self.shape_y = -5000
+
+    def activate(self, shape_coords, color_name, cell_size, touch_pos, offset):
+        self.cell_size = cell_size
+        self.active = True
+        self.offset_x, self.offset_y = offset
+
+        # Делаем фигуру при перетаскивании чуть прозрачной (0.8)
+        raw = COLORS[color_name]
+        rgba = (raw[0], raw[1], raw[2], 0.8)
+        size = (cell_size - GAP*2, cell_size - GAP*2)
+        count = len(shape_coords)
+        for i, block in enumerate(self.blocks):
+            if i < count:
+                bx, by = shape_coords[i]
+                block.update((bx * cell_size + GAP, by * cell_size + GAP), size, rgba)
+            elif i < self.visible_blocks:
+                block.hide()
+        self.visible_blocks = count
+        self.update_pos(touch_pos)
+
+    def update_pos(self, touch_pos):
+        if not self.active: return
+        self.shape_x = self.translate.x = touch_pos[0] + self.offset_x
+        self.shape_y = self.translate.y = touch_pos[1] + self.offset_y
+
+    def hide(self):
+        # Блоки остаются раскрашенными, просто уезжают за экран
+        self.active = False
+        self.shape_x = self.translate.x = -5000
+        self.shape_y = self.translate.y = -5000
+
+class ClearEffects:
+    """
+    Эффект очистки линий поверх поля: по заранее созданному квадрату
+    на клетку, квадраты гаснут и сжимаются. Клетки одного хода — одна
+    партия, все партии обновляет один тик Clock. Модель к этому моменту
+    уже очищена, так что эффект ничего не ждёт и не держит ввод.
+    В canvas лежат только квадраты идущих эффектов (маска shown),
+    погасшие из него убираются и не рисуются каждый кадр.
+    """
+    def __init__(self, board):
+        self.board = board
+        self.group = InstructionGroup()
+        board.canvas.after.add(self.group)
+        self.colors = []
+        self.rects = []
+        self.batches = []  # [время старта, маска клеток]
+        self.shown = 0  # клетки, чьи квадраты сейчас в group
+        self.event = None
+
+    def build(self):
+        self.stop()
+        self.group.clear()
+        self.shown = 0
+        self.colors = []
+        self.rects = []
+        for _ in range(GRID_SIZE * GRID_SIZE):
+            self.colors.append(Color(0, 0, 0, 0))
+            self.rects.append(RoundedRectangle(pos=(0, 0), size=(0, 0), radius=[dp(3)]))
+
+    def start(self, mask, color_ids):
+        """Запускает эффект для клеток mask; color_ids — цвета модели до очистки"""
+        for i in iter_bits(mask):
+            self.colors[i].rgba = COLORS[COLOR_NAMES[color_ids[i]]]
+        for i in iter_bits(mask & ~self.shown):
+            self.group.add(self.colors[i])
+            self.group.add(self.rects[i])
+        self.shown |= mask
+        self.batches.append([Clock.get_time(), mask])
+        self.tick(0)
+        if self.event is None:
+            self.event = Clock.schedule_interval(self.tick, 0)
+
+    def tick(self, dt):
+        now = Clock.get_time()
+        board = self.board
+        size = board.cell_size
+        for k in range(len(self.batches) - 1, -1, -1):
+            start, mask = self.batches[k]
+            progress = (now - start) / CLEAR_EFFECT_TIME
+            if progress >= 1 or not mask:
+                self.hide(mask)
+                del self.batches[k]
+                continue
+            inset = size * 0.25 * progress
+            side = size - 2 * inset
+            for i in iter_bits(mask):
+                self.colors[i].a = 1 - progress
+                self.rects[i].pos = (board.grid_x + (i % GRID_SIZE) * size + inset,
+                                     board.grid_y + (i // GRID_SIZE) * size + inset)
+                self.rects[i].size = (side, side)
+        if not self.batches and self.event is not None:
+            self.event.cancel()
+            self.event = None
+
+    def cancel(self, mask):
+        """Клетки снова заняты: их эффект больше не нужен"""
+        for batch in self.batches:
+            if batch[1] & mask:
+                self.hide(batch[1] & mask)
+                batch[1] &= ~mask
+
+    def stop(self):
+        for _, mask in self.batches:
+            self.hide(mask)
+        self.batches.clear()
+        if self.event is not None:
+            self.event.cancel()
+            self.event = None
+
+    def hide(self, mask):
+        for i in iter_bits(mask & self.shown):
+            self.group.remove(self.colors[i])
+            self.group.remove(self.rects[i])
+        self.shown &= ~mask
+
+class BoardMixin:
+    """
+    Общая часть поля: модель движка, призрак и пересчёт координат.
+    Примешивается к виджету (class X(BoardMixin, Widget)), который решает,
+    чем рисовать клетки: задаёт cell_at и дополняет build_grid / update_layout.
+
+    Клетки не перекрашиваются сразу: изменения модели и призрака только
+    помечают клетки в маске dirty, а flush перед кадром пишет в каждую
+    итоговый вид — и только если он отличается от нарисованного.
+    Клетка, занятая и тут же очищенная линией, не перекрашивается вовсе.
+    Внутри transaction() кадр не применит половину хода.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.cell_size = dp(40)
+        self.grid_x = 0
+        self.grid_y = 0
+        # Состояние поля живёт в движке, клетки только рисуют его
+        self.model = Board()
+        # Призрак считается в движке, здесь только перекраска клеток
+        self.ghost = Ghost()
+        self.ghost_color = 0
+        self.effects = ClearEffects(self)
+        self.dirty = 0
+        self.shown = [EMPTY_VIEW] * (GRID_SIZE * GRID_SIZE)
+        self.depth = 0
+        # -1: до отрисовки того же кадра, в котором пришло касание
+        self.flush_trigger = Clock.create_trigger(self.flush, -1)
+
+    @contextmanager
+    def transaction(self):
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if not self.depth and self.dirty:
+                self.flush_trigger()
+
+    def stage(self, mask):
+        """Клетки mask надо перерисовать по модели и призраку"""
+        self.dirty |= mask
+        if not self.depth and self.dirty:
+            self.flush_trigger()
+
+    @profiling.timed('BoardMixin.flush')
+    def flush(self, *args):
+        """Применяет накопленное: одна запись на клетку, чей вид изменился"""
+        if self.depth: return
+        dirty, self.dirty = self.dirty, 0
+        model = self.model
+        ghost = self.ghost.mask
+        shown = self.shown
+        for i in iter_bits(dirty):
+            if model.mask >> i & 1:
+                view = model.colors[i]
+            elif ghost >> i & 1:
+                view = GHOST_VIEW + self.ghost_color
+            else:
+                view = EMPTY_VIEW
+            if shown[i] != view:
+                shown[i] = view
+                self.cell_at(i).paint(view_rgba(view))
+
+    def build_grid(self):
+        self.effects.build()
+        # Новые клетки пусты: перерисовать всё, что уже есть в модели
+        self.shown = [EMPTY_VIEW] * (GRID_SIZE * GRID_SIZE)
+        self.stage(self.model.mask | self.ghost.mask)
+        self.bind(pos=self.update_layout, size=self.update_layout)
+        Clock.schedule_once(self.update_layout, 0)
+
+    def update_layout(self, *args):
+        dim = min(self.width, self.height)
+        if dim == 0: return
+        self.cell_size = dim / GRID_SIZE
+        self.grid_x = self.x + (self.width - dim) / 2
+        self.grid_y = self.y + (self.height - dim) / 2
+        return dim
+
+    def get_grid_pos(self, screen_x, screen_y):
+        if self.cell_size == 0: return None, None
+        gx = int((screen_x - self.grid_x) / self.cell_size)
+        gy = int((screen_y - self.grid_y) / self.cell_size)
+        if 0 <= gx < GRID_SIZE and 0 <= gy < GRID_SIZE:
+            return gx, gy
+        return None, None
+
+    @profiling.timed('BoardMixin.clear_preview')
+    def clear_preview(self):
+        """Очищает призрака"""
+        self.stage(self.ghost.clear())
+
+    @profiling.timed('BoardMixin.show_preview')
+    def show_preview(self, shape, start_gx, start_gy):
+        """Показывает призрака (перерисовываются только вошедшие/ушедшие клетки)"""
+        erase, paint = self.ghost.move(self.model, shape, start_gx, start_gy)
+        if paint:
+            self.ghost_color = shape.color_id
+        self.stage(erase | paint)
+        return self.ghost.ok
+
+    def place_shape(self, shape, start_gx, start_gy):
+        placed = self.model.place(shape, start_gx, start_gy)
+        if placed:
+            self.effects.cancel(placed)
+            self.stage(placed)
+        return bool(placed)
+
+    def clear_lines(self):
+        """Убирает полные линии из модели и запускает эффект. Возвращает число линий"""
+        lines, cleared = clear_mask(self.model.mask, self.model.geo)
+        if lines:
+            self.effects.start(cleared, self.model.colors)
+            self.model.clear_lines()
+            self.clear_cells(cleared)
+        return lines
+
+    def clear_cells(self, mask):
+        """Перерисовывает клетки, очищенные в модели (mask — биты клеток)"""
+        self.stage(mask)
+
+    def reset_board(self):
+        self.effects.stop()
+        self.stage(self.model.mask | self.ghost.clear())
+        self.model.clear()
+
+    def set_position(self, mask, colors):
+        """Выставляет поле целиком (сохранение, отмена хода)"""
+        model = self.model
+        self.stage(model.mask | mask)
+        model.mask = mask
+        model.colors[:] = colors
+
+class GameBoard(BoardMixin, Widget):
+    """Поле из GameCell-виджетов в GridLayout."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.cells = []
+        self.grid_layout = GridLayout(cols=GRID_SIZE, spacing=0)
+        self.add_widget(self.grid_layout)
+
+    def build_grid(self):
+        self.grid_layout.clear_widgets()
+        self.cells = []
+        temp_cells = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+        
+        for y in range(GRID_SIZE - 1, -1, -1):
+            for x in range(GRID_SIZE):
+                cell = GameCell()
+                self.grid_layout.add_widget(cell)
+                temp_cells[x][y] = cell
+                
+        self.cells = temp_cells
+        super().build_grid()
+
+    def update_layout(self, *args):
+        dim = super().update_layout()
+        if not dim: return
+        
+        self.grid_layout.size_hint = (None, None)
+        self.grid_layout.size = (dim, dim)
+        self.grid_layout.pos = (self.grid_x, self.grid_y)
+
+    def cell_at(self, i):
+        return self.cells[i % GRID_SIZE][i // GRID_SIZE]
+
+class CanvasCell:
+    """
+    Клетка CanvasBoard: не виджет, а пара инструкций Color + RoundedRectangle.
+    Повторяет интерфейс GameCell.
+    """
+    __slots__ = ('color', 'rect')
+
+    def __init__(self, color, rect):
+        self.color = color
+        self.rect = rect
+
+    def paint(self, rgba):
+        self.color.rgba = rgba
+
+class CanvasBoard(BoardMixin, Widget):
+    """
+    Поле одним виджетом: все клетки — заранее созданные инструкции
+    в одной InstructionGroup, которые меняются на месте.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.cells_flat = []
+        self.group = InstructionGroup()
+        self.canvas.add(self.group)
+
+    def build_grid(self):
+        self.group.clear()
+        self.cells_flat = []
+        empty = COLORS['grid_empty']
+        for i in range(GRID_SIZE * GRID_SIZE):
+            color = Color(*empty)
+            rect = RoundedRectangle(pos=(0, 0), size=(0, 0), radius=[dp(3)])
+            self.group.add(color)
+            self.group.add(rect)
+            self.cells_flat.append(CanvasCell(color, rect))
+        super().build_grid()
+
+    def update_layout(self, *args):
+        dim = super().update_layout()
+        if not dim: return
+        
+        size = self.cell_size
+        for i, cell in enumerate(self.cells_flat):
+            cell.rect.pos = (self.grid_x + (i % GRID_SIZE) * size,
+                             self.grid_y + (i // GRID_SIZE) * size)
+            cell.rect.size = (size, size)
+
+    def cell_at(self, i):
+        return self.cells_flat[i]
+
+# Выбор отрисовщика поля при старте: BLOCK_PUZZLE_BOARD=canvas
+BOARD_RENDERERS = {'cells': GameBoard, 'canvas': CanvasBoard}
+BOARD_RENDERER = os.environ.get('BLOCK_PUZZLE_BOARD', 'cells')
+
+class SlotLayouts:
+    """
+    Раскладка фигур в слотах: смещения блоков от центра слота, размер блока
+    и половина ширины фигуры. Зависит только от фигуры, масштаба и ширины
+    окна, так что считается один раз на фигуру, а не на каждое событие
+    pos/size. Кеш сбрасывается, только когда ширина окна на самом деле
+    изменилась (поворот, складной экран), и ограничен по числу записей.
+    """
+    def __init__(self, size=SLOT_LAYOUT_CACHE):
+        self.cache = OrderedDict()
+        self.size = size
+        # Window.width — вычисляемое свойство: читаем его на resize, а не на каждом событии
+        self.window_width = Window.width
+        Window.bind(size=self.on_window_size)
+
+    def on_window_size(self, window, size):
+        if window.width != self.window_width:
+            self.window_width = window.width
+            self.cache.clear()
+
+    def get(self, shape, scale):
+        key = (shape.id, scale)
+        layout = self.cache.get(key)
+        if layout is not None:
+            self.cache.move_to_end(key)
+            return layout
+
+        cell_size = (self.window_width / 10) * scale
+        left = -shape.width * cell_size / 2
+        bottom = -shape.height * cell_size / 2
+        offsets = tuple((left + bx * cell_size + GAP, bottom + by * cell_size + GAP)
+                        for bx, by in shape.coords)
+        layout = (offsets, (cell_size - GAP*2, cell_size - GAP*2), -left)
+        self.cache[key] = layout
+        if len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+        return layout
+
+slot_layouts = SlotLayouts()
+
+class SlotWidget(Widget):
+    """Слот с фигурой."""
+    def __init__(self, game_screen, **kwargs):
+        super().__init__(**kwargs)
+        self.game = game_screen
+        self.blocks = []
+        for _ in range(MAX_SHAPE_CELLS):
+            self.blocks.append(SingleBlockGraphic(self.canvas))
+            
+        self.shape = None
+        self.shape_coords = []
+        self.color_name = 'blue'
+        self.is_filled = False
+        self.preview_scale = 0.6
+        self.drawn = None  # (раскладка, цвет, центр) последней отрисовки
+        self.ghost_origin = None  # клетка призрака, уже ушедшая в телеметрию
+        self.bind(pos=self.update_visuals, size=self.update_visuals)
+
+    def set_shape(self, shape):
+        self.shape = shape
+        self.shape_coords = shape.coords
+        self.color_name = shape.color
+        self.is_filled = True
+        self.update_visuals()
+
+    def set_empty(self):
+        self.is_filled = False
+        self.drawn = None
+        for b in self.blocks: b.hide()
+
+    @profiling.timed('SlotWidget.update_visuals')
+    def update_visuals(self, *args):
+        if not self.is_filled:
+            for b in self.blocks: b.hide()
+            return
+
+        layout = slot_layouts.get(self.shape, self.preview_scale)
+        cx = self.x + self.width / 2
+        cy = self.y + self.height / 2
+        rgba = self.shape.rgba
+        # pos и size меняются парой: второе событие ничего не двигает.
+        # Цвет в ключе: у фигур с одинаковыми клетками раскладка одна и та же
+        drawn = (layout, rgba, cx, cy)
+        if drawn == self.drawn:
+            return
+        self.drawn = drawn
+
+        offsets, size, _ = layout
+        count = len(offsets)
+        for i, block in enumerate(self.blocks):
+            if i < count:
+                dx, dy = offsets[i]
+                block.update((cx + dx, cy + dy), size, rgba)
+            else:
+                block.hide()
+
+    def on_touch_down(self, touch):
+        if self.is_filled and self.collide_point(*touch.pos):
+            touch.grab(self)
+            # Пока фигуру тянут, фоновые прогоны сложности не отнимают у кадра время
+            self.game.tuner.cancel()
+            self.game.cancel_hint()
+            telemetry.emit(telemetry.DRAG_START, self.game.slots.index(self), self.shape.id)
+            self.ghost_origin = None
+            
+            real_cell_size = self.game.board.cell_size
+            if real_cell_size == 0: real_cell_size = dp(40)
+            
+            # Смещение, чтобы палец был по центру фигуры
+            half_width = slot_layouts.get(self.shape, self.preview_scale)[2]
+            offset = (-half_width, dp(50))
+            
+            self.game.drag_widget.activate(
+                self.shape_coords, 
+                self.color_name, 
+                real_cell_size, 
+                touch.pos,
+                offset
+            )
+            for b in self.blocks: b.hide()
+            self.drawn = None
+            return True
+        return super().on_touch_down(touch)
+        
+    @profiling.timed('SlotWidget.on_touch_move')
+    def on_touch_move(self, touch):
+        if touch.grab_current is self:
+            drag = self.game.drag_widget
+            drag.update_pos(touch.pos)
+            
+            # --- GHOST LOGIC ---
+            check_x = drag.shape_x + drag.cell_size / 2
+            check_y = drag.shape_y + drag.cell_size / 2
+            
+            gx, gy = self.game.board.get_grid_pos(check_x, check_y)
+            
+            if gx is not None and gy is not None:
+                ok = self.game.board.show_preview(self.shape, gx, gy)
+            else:
+                ok = False
+                self.game.board.clear_preview()
+            # В телеметрию — только смена клетки, а не каждое движение пальца
+            if (gx, gy) != self.ghost_origin:
+                self.ghost_origin = (gx, gy)
+                telemetry.emit(telemetry.GHOST, -1 if gx is None else gx,
+                               -1 if gy is None else gy, int(ok))
+            
+            return True
+        return super().on_touch_move(touch)
+        
+    def on_touch_up(self, touch):
+        if touch.grab_current is self:
+            touch.ungrab(self)
+            
+            drag = self.game.drag_widget
+            check_x = drag.shape_x + drag.cell_size / 2
+            check_y = drag.shape_y + drag.cell_size / 2
+            
+            board = self.game.board
+            gx, gy = board.get_grid_pos(check_x, check_y)
+            success = gx is not None and gy is not None and board.model.fits(self.shape, gx, gy)
+
+            drag.hide()
+            telemetry.emit(telemetry.DRAG_END, self.game.slots.index(self),
+                           -1 if gx is None else gx, -1 if gy is None else gy)
+            # Призрак, фигура и очищенные линии — одной перерисовкой в кадре
+            with board.transaction():
+                board.clear_preview()
+                if success:
+                    self.game.place_from_slot(self, gx, gy)
+            if not success:
+                self.update_visuals()
+                self.game.tune_difficulty()
+            
+            return True
+        return super().on_touch_up(touch)
+
+class MessagePopup(Popup):
+    """
+    Окно сообщений (уровень пройден, конец игры). Создаётся один раз
+    и переиспользуется; пока оно открыто (или ещё гаснет), следующие
+    сообщения ждут в очереди.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(size_hint=(0.8, 0.4), auto_dismiss=False, **kwargs)
+        self.message = Label(font_size=dp(24))
+        self.ok_button = Button(text="OK")
+        self.undo_button = Button(text="UNDO", background_color=(0.3, 0.3, 0.4, 1))
+        self.ok_button.bind(on_release=lambda *args: self.press(self.ok_action))
+        self.undo_button.bind(on_release=lambda *args: self.press(self.undo_action))
+        self.buttons = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(10))
+        self.buttons.add_widget(self.ok_button)
+        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
+        content.add_widget(self.message)
+        content.add_widget(self.buttons)
+        self.content = content
+        self.ok_action = None
+        self.undo_action = None
+        self.queue = deque()
+
+    def show(self, title, msg, color, ok_action=None, undo_action=None):
+        if self._is_open:
+            self.queue.append((title, msg, color, ok_action, undo_action))
+            return
+        self.title = title
+        self.title_color = color
+        self.separator_color = color
+        self.message.text = msg
+        self.ok_button.background_color = color
+        self.ok_action = ok_action
+        self.undo_action = undo_action
+        if undo_action and self.undo_button.parent is None:
+            self.buttons.add_widget(self.undo_button)
+        elif not undo_action and self.undo_button.parent is not None:
+            self.buttons.remove_widget(self.undo_button)
+        self.open()
+
+    def press(self, action):
+        # Повторное нажатие, пока окно гаснет, действие не повторяет
+        self.ok_action = self.undo_action = None
+        self.dismiss()
+        if action: action()
+
+    def on__is_open(self, instance, is_open):
+        # ModalView дочищает себя уже после сброса _is_open — открываем следующим кадром
+        if not is_open and self.queue:
+            Clock.schedule_once(self.show_next)
+
+    def show_next(self, *args):
+        if self.queue and not self._is_open:
+            self.show(*self.queue.popleft())
+
+class GameScreen(Screen):
+    score = NumericProperty(0)
+    score_text = StringProperty("Score: 0")
+    autoplay = BooleanProperty(False)
+    # Режим практики: без реплея, с отменой и повтором ходов
+    practice = BooleanProperty(False)
+    can_undo = BooleanProperty(False)
+    can_redo = BooleanProperty(False)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.drag_widget = DragWidget()
+        self.board = BOARD_RENDERERS.get(BOARD_RENDERER, GameBoard)()
+        self.slots = []
+        self.mode = 'classic'
+        self.target_score = START_TARGET
+        self.level_pending = False
+        self.solver = Solver()
+        self.autoplay_event = None
+        self.hint_event = None
+        # Своя раздача у каждой партии: по сиду и реплею её можно повторить
+        self.seed = 0
+        self.rng = random.Random()
+        self.replay = None
+        self.fair_deal = False
+        self.dealer = RandomDealer()
+        # Adventure: наклон раздачи подбирается в фоне (difficulty.py)
+        self.tuner = DifficultyTuner()
+        self.replay_tilt = 0.0  # последний наклон в реплее, None — неизвестен
+        self.game_over = True
+        self.resume_requested = False
+        self._data_dir = None
+        self.history = History()
+        self.rng_packed = None  # состояние ГСЧ для истории, до следующей раздачи
+        self.spawn_event = None
+        self.level_event = None
+        # Для статистики: ходы, линии, уровень и время игры без пауз
+        self.moves = 0
+        self.lines_cleared = 0
+        self.level = 1
+        self.total_score = 0  # Adventure: счёт уровня обнуляется, этот — нет
+        self.played = 0.0
+        self.play_mark = None
+        # Одно окно сообщений на все уровни и проигрыши, создаётся заранее
+        self.popup = MessagePopup()
+
+    def on_enter(self):
+        if not self.ids.board_container.children:
+            self.ids.board_container.add_widget(self.board)
+            self.board.build_grid()
+            
+            for _ in range(3):
+                anchor = AnchorLayout(anchor_x='center', anchor_y='center')
+                slot = SlotWidget(self)
+                self.slots.append(slot)
+                anchor.add_widget(slot)
+                self.ids.spawn_grid.add_widget(anchor)
+            
+            Window.add_widget(self.drag_widget)
+
+            # Диспетчеризации свойств для оверлея профилировщика
+            profiling.watch(self, 'score', 'score_text')
+            for i in range(GRID_SIZE * GRID_SIZE):
+                cell = self.board.cell_at(i)
+                if isinstance(cell, Widget):
+                    profiling.watch(cell, 'display_color')
+
+        resume, self.resume_requested = self.resume_requested, False
+        if not (resume and self.resume_game()):
+            self.start_game()
+        self.resume_clock()
+
+    def on_leave(self):
+        self.set_autoplay(False)
+        self.pause_clock()
+        self.save_game(durable=True)
+        self.close_replay()
+
+    def go_to_menu(self):
+        self.manager.current = 'menu'
+
+    def start_game(self):
+        self.board.reset_board()
+        self.seed = new_seed()
+        self.rng = random.Random(self.seed)
+        self.dealer = FairDealer() if self.fair_deal else RandomDealer()
+        self.tuner.reset()
+        self.replay_tilt = 0.0
+        self.game_over = False
+        self.clear_history()
+        self.target_score = START_TARGET
+        self.open_replay()
+        self.moves = self.lines_cleared = 0
+        self.level = 1
+        self.total_score = 0
+        self.played = 0.0
+        self.play_mark = time.monotonic()
+        
+        self.score = 0
+        self.update_score_label()
+        for slot in self.slots: slot.set_empty()
+        self.spawn_new_shapes()
+
+    def update_score_label(self):
+        if self.mode == 'adventure':
+            self.score_text = f"Score: {self.score} / {self.target_score}"
+        else:
+            self.score_text = f"Score: {self.score}"
+
+    def spawn_new_shapes(self):
+        self.spawn_event = None
+        self.rng_packed = None
+        if self.mode == 'adventure':
+            self.set_tilt(self.tuner.tilt)
+        shapes = self.dealer.deal(self.board.model.mask, self.rng)
+        for slot, shape in zip(self.slots, shapes):
+            slot.set_shape(shape)
+        telemetry.emit(telemetry.SPAWN, *(s.id for s in shapes))
+        self.save_game()
+        self.check_game_over()
+        self.tune_difficulty()
+
+    def on_shape_placed(self):
+        if all(not s.is_filled for s in self.slots):
+            self.spawn_event = Clock.schedule_once(lambda dt: self.spawn_new_shapes(), 0.1)
+        else:
+            self.check_game_over()
+
+    def place_from_slot(self, slot, gx, gy):
+        """Ставит фигуру из слота (пальцем или автоигрой)"""
+        before = self.position() if self.practice else None
+        if not self.board.place_shape(slot.shape, gx, gy):
+            return False
+        if before:
+            self.history.push(before)
+            self.update_history_flags()
+        if self.replay: self.replay.place(self.slots.index(slot), gx, gy)
+        telemetry.emit(telemetry.PLACE, slot.shape.id, gx, gy)
+        self.moves += 1
+        self.check_lines()
+        self.process_score(slot.shape.count)
+        slot.set_empty()
+        self.save_game()
+        self.on_shape_placed()
+        self.tune_difficulty()
+        return True
+
+    # --- СОХРАНЕНИЕ ---
+    def data_dir(self):
+        """user_data_dir запоминается: второй on_stop Kivy зовёт, когда App уже нет"""
+        if self._data_dir is None:
+            self._data_dir = App.get_running_app().user_data_dir
+        return self._data_dir
+
+    def save_path(self):
+        return os.path.join(self.data_dir(), snapshot.SAVE_NAME)
+
+    def save_game(self, durable=False):
+        """Снимок партии: после каждого хода, на паузе и при выходе в меню"""
+        if self.game_over: return
+        model = self.board.model
+        snap = snapshot.Snapshot(
+            mode=self.mode, fair=self.fair_deal, practice=self.practice, size=model.size,
+            catalog=CATALOG_HASH,
+            mask=model.mask, colors=model.colors,
+            slots=tuple(s.shape.id if s.is_filled else None for s in self.slots),
+            score=self.score, target_score=self.target_score, seed=self.seed,
+            rng_state=self.rng.getstate(),
+            replay=os.path.basename(self.replay.path) if self.replay else '',
+            moves=self.moves, lines=self.lines_cleared, level=self.level, played=self.play_time(),
+            total_score=self.total_score)
+        try:
+            snapshot.save(self.save_path(), snapshot.pack(snap), durable)
+        except OSError:
+            pass
+
+    def resume_game(self):
+        """Продолжает партию из сохранения. False — сохранения нет или оно не подходит"""
+        try:
+            snap = snapshot.load(self.save_path())
+        except (OSError, snapshot.SnapshotError):
+            return False
+        if snap.catalog != CATALOG_HASH or snap.size != GRID_SIZE:
+            return False
+
+        self.close_replay()
+        self.mode = snap.mode
+        self.fair_deal = snap.fair
+        self.practice = snap.practice
+        self.target_score = snap.target_score
+        self.seed = snap.seed
+        self.rng = random.Random()
+        self.rng.setstate(snap.rng_state)
+        self.dealer = FairDealer() if self.fair_deal else RandomDealer()
+        self.tuner.reset()
+        # Реплей дописывается, а какой наклон в нём последний — неизвестно
+        self.replay_tilt = None
+        self.game_over = False
+        self.clear_history()
+        self.moves = snap.moves
+        self.lines_cleared = snap.lines
+        self.level = snap.level
+        self.total_score = snap.total_score
+        self.played = snap.played
+        self.play_mark = None
+
+        # Реплей дописывается дальше: раздача продолжается с того же состояния ГСЧ
+        path = os.path.join(self.replay_dir(), snap.replay)
+        if snap.replay and os.path.exists(path):
+            try:
+                self.replay = ReplayWriter.reopen(path)
+            except OSError:
+                self.replay = None
+
+        self.show_position(snap.mask, snap.colors, snap.slots, snap.score)
+        return True
+
+    def show_position(self, mask, colors, slots, score):
+        """Выставляет поле, слоты и счёт (сохранение или отмена хода)"""
+        for event in (self.spawn_event, self.level_event):
+            if event: event.cancel()
+        self.spawn_event = self.level_event = None
+        self.level_pending = False
+        self.board.clear_preview()
+        self.board.effects.stop()
+
+        # Перерисуются только клетки, которые отличаются
+        self.board.set_position(mask, colors)
+        for slot, shape_id in zip(self.slots, slots):
+            if shape_id is None: slot.set_empty()
+            else: slot.set_shape(SHAPES[shape_id])
+
+        self.score = score
+        self.update_score_label()
+        # Положение сразу после хода: он мог добрать цель уровня или опустошить слоты
+        self.process_score(0)
+        self.on_shape_placed()
+
+    # --- ОТМЕНА И ПОВТОР (практика) ---
+    def position(self):
+        """Неизменяемое положение партии для истории"""
+        if self.rng_packed is None:
+            self.rng_packed = snapshot.pack_rng(self.rng.getstate())
+        model = self.board.model
+        return Position(mask=model.mask, colors=bytes(model.colors),
+                        slots=tuple(s.shape.id if s.is_filled else None for s in self.slots),
+                        score=self.score, target_score=self.target_score, level=self.level,
+                        moves=self.moves, lines=self.lines_cleared,
+                        total_score=self.total_score, rng=self.rng_packed)
+
+    def undo(self):
+        self.load_position(self.history.undo(self.position()))
+
+    def redo(self):
+        self.load_position(self.history.redo(self.position()))
+
+    def load_position(self, position):
+        if position is None: return
+        self.set_autoplay(False)
+        if position.rng is not self.rng_packed:
+            self.rng.setstate(snapshot.unpack_rng(position.rng))
+            self.rng_packed = position.rng
+        self.game_over = False
+        self.resume_clock()
+        self.target_score = position.target_score
+        self.level = position.level
+        self.moves = position.moves
+        self.lines_cleared = position.lines
+        self.total_score = position.total_score
+        self.update_history_flags()
+        with self.board.transaction():
+            self.show_position(position.mask, position.colors, position.slots, position.score)
+        self.save_game()
+
+    def clear_history(self):
+        self.history.clear()
+        self.rng_packed = None
+        self.update_history_flags()
+
+    def update_history_flags(self):
+        self.can_undo = self.history.can_undo
+        self.can_redo = self.history.can_redo
+
+    # --- СЛОЖНОСТЬ (Adventure) ---
+    def set_tilt(self, tilt):
+        """Наклон следующей раздачи; реплею — только когда он изменился"""
+        self.dealer.set_tilt(tilt)
+        if self.replay and tilt != self.replay_tilt:
+            self.replay.tilt(tilt)
+            self.replay_tilt = tilt
+
+    def tune_difficulty(self):
+        """Оценить в фоне положение после хода или раздачи"""
+        # В практике наклон не меняется: ход после отмены получит ту же раздачу
+        if self.mode != 'adventure' or self.game_over or self.practice: return
+        hand = [s.shape for s in self.slots if s.is_filled]
+        self.tuner.request(self.board.model.mask, hand, self.level)
+
+    # --- СТАТИСТИКА ---
+    def play_time(self):
+        """Секунды игры в этой партии, без пауз приложения и времени в меню"""
+        if self.play_mark is None: return self.played
+        return self.played + time.monotonic() - self.play_mark
+
+    def pause_clock(self):
+        self.played = self.play_time()
+        self.play_mark = None
+
+    def resume_clock(self):
+        if self.play_mark is None and not self.game_over:
+            self.play_mark = time.monotonic()
+
+    def record_stats(self, kind):
+        """Партия или уровень в историю (stats.py пишет её в фоне)"""
+        if self.practice: return  # с отменой ходов результаты не сравнить
+        score = self.total_score if kind == 'game' else self.score
+        App.get_running_app().stats_store().record(
+            kind, self.mode, score, self.moves, self.lines_cleared, self.play_time(),
+            self.level, self.fair_deal)
+
+    # --- РЕПЛЕИ ---
+    def replay_dir(self):
+        return os.path.join(self.data_dir(), 'replays')
+
+    def open_replay(self):
+        self.close_replay()
+        if self.practice:
+            return  # с отменой ходов реплей уже не повторить
+        try:
+            folder = self.replay_dir()
+            os.makedirs(folder, exist_ok=True)
+            # Храним только последние MAX_REPLAYS партий
+            old = sorted(f for f in os.listdir(folder) if f.endswith(REPLAY_EXTENSION))
+            for name in old[:max(0, len(old) - MAX_REPLAYS + 1)]:
+                os.remove(os.path.join(folder, name))
+            name = '%d_%s%s' % (time.time() * 1000, self.mode, REPLAY_EXTENSION)
+            self.replay = ReplayWriter(os.path.join(folder, name), self.seed, self.mode,
+                                       self.target_score, fair=self.fair_deal)
+        except OSError:
+            self.replay = None
+
+    def close_replay(self, final_score=None):
+        if self.replay:
+            if final_score is None: self.replay.close()
+            else: self.replay.finish(final_score)
+            self.replay = None
+
+    # --- ПОДСКАЗКА И АВТОИГРА ---
+    def current_plan(self):
+        shapes = [s.shape if s.is_filled else None for s in self.slots]
+        return self.solver.solve(self.board.model.mask, shapes, time_budget=HINT_BUDGET)
+
+    def show_hint(self):
+        plan = self.current_plan()
+        if plan is None: return
+        slot, gx, gy = plan.moves[0]
+        self.cancel_hint()
+        self.board.show_preview(self.slots[slot].shape, gx, gy)
+        self.hint_event = Clock.schedule_once(self.clear_hint, HINT_SECONDS)
+
+    def clear_hint(self, dt=None):
+        self.hint_event = None
+        # Призрак уже принадлежит протяжке — не трогаем
+        if not self.drag_widget.active:
+            self.board.clear_preview()
+
+    def cancel_hint(self):
+        """Игрок взял фигуру или попросил новую подсказку: старый таймер не нужен"""
+        if self.hint_event:
+            self.hint_event.cancel()
+            self.hint_event = None
+
+    def toggle_autoplay(self):
+        self.set_autoplay(not self.autoplay)
+
+    def set_autoplay(self, enabled):
+        self.autoplay = enabled
+        if self.autoplay_event:
+            self.autoplay_event.cancel()
+            self.autoplay_event = None
+        if enabled:
+            self.autoplay_event = Clock.schedule_interval(self.autoplay_step, AUTOPLAY_INTERVAL)
+
+    def autoplay_step(self, dt):
+        # Не мешаем пальцу и ждём спавна / перехода уровня
+        if self.drag_widget.active or self.level_pending: return
+        plan = self.current_plan()
+        if plan is None: return
+        slot, gx, gy = plan.moves[0]
+        with self.board.transaction():
+            self.place_from_slot(self.slots[slot], gx, gy)
+
+    @profiling.timed('GameScreen.check_lines')
+    def check_lines(self):
+        lines = self.board.clear_lines()
+        if lines:
+            self.lines_cleared += lines
+            self.process_score(line_points(lines))
+            telemetry.emit(telemetry.LINES, lines, line_points(lines), self.score)
+
+    def process_score(self, points):
+        self.score += points
+        self.total_score += points
+        self.update_score_label()
+        if self.mode == 'adventure' and self.score >= self.target_score and not self.level_pending:
+            self.level_pending = True
+            self.level_event = Clock.schedule_once(lambda dt: self.level_up(), 0.5)
+
+    def level_up(self):
+        self.level_event = None
+        self.level_pending = False
+        if self.replay: self.replay.level_up()
+        self.record_stats('level')
+        self.level += 1
+        self.target_score = int(self.target_score * TARGET_FACTOR)
+        self.score = 0
+        self.board.reset_board()
+        self.update_score_label()
+        # Сначала поздравление: если новая раздача сразу не влезет, «конец игры» встанет за ним
+        self.show_popup("LEVEL COMPLETE", "Next Level!", color=(0.2, 0.8, 0.4, 1))
+        self.spawn_new_shapes()
+
+    @profiling.timed('GameScreen.check_game_over')
+    def check_game_over(self):
+        active_shapes = [s.shape for s in self.slots if s.is_filled]
+        if not active_shapes: return
+
+        if not self.board.model.can_place_any(active_shapes):
+            self.record_stats('game')
+            telemetry.emit(telemetry.GAME_OVER, self.score, self.moves, self.level)
+            self.pause_clock()
+            self.game_over = True
+            try:
+                snapshot.delete(self.save_path())
+            except OSError:
+                pass
+            self.close_replay(self.score)
+            self.show_popup("GAME OVER", f"Score: {self.score}", restart=True,
+                            undo=self.history.can_undo)
+
+    def show_popup(self, title, msg, restart=False, color=(1, 0.3, 0.3, 1), undo=False):
+        # Практика: проигрыш можно отменить
+        self.popup.show(title, msg, color, ok_action=self.start_game if restart else None,
+                        undo_action=self.undo if undo else None)
@@ -0,0 +1,92 @@
+"""
+История ходов для отмены и повтора (режим практики).
+
+Запись — неизменяемое положение до хода: маска поля, цвета клеток (bytes),
+id фигур в слотах, счёт, цель и номер уровня, счётчики ходов и линий,
+счёт всей партии и упакованное состояние ГСЧ.
+Глубоких копий виджетов нет, запись весит несколько сотен байт.
+
+ГСЧ меняется только при раздаче, поэтому записи между раздачами ссылаются
+на один и тот же объект состояния и в бюджет памяти он входит один раз.
+При превышении бюджета выбрасываются самые старые записи.
+"""
+import sys
+from collections import deque, namedtuple
+
+HISTORY_BUDGET = 1 << 20  # байт, ~800 ходов с обычной раздачей
+
+Position = namedtuple('Position', 'mask colors slots score target_score level moves lines total_score rng')
+
+
+class History:
+    def __init__(self, budget=HISTORY_BUDGET):
+        self.budget = budget
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.size = 0
+        self._shared = {}  # id(rng) -> [rng, число записей]
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._shared.clear()
+        self.size = 0
+
+    def push(self, position):
+        """Новый ход: положение до него уходит в историю, повторять больше нечего."""
+        while self.redo_stack:
+            self._release(self.redo_stack.pop())
+        self._retain(position)
+        self.undo_stack.append(position)
+        while self.size > self.budget and len(self.undo_stack) > 1:
+            self._release(self.undo_stack.popleft())
+
+    def undo(self, current):
+        """Возвращает положение до последнего хода (current уходит в повтор) или None."""
+        if not self.undo_stack:
+            return None
+        self._retain(current)
+        self.redo_stack.append(current)
+        position = self.undo_stack.pop()
+        self._release(position)
+        return position
+
+    def redo(self, current):
+        if not self.redo_stack:
+            return None
+        self._retain(current)
+        self.undo_stack.append(current)
+        position = self.redo_stack.pop()
+        self._release(position)
+        return position
+
+    @staticmethod
+    def _cost(position):
+        return (sys.getsizeof(position) + sys.getsizeof(position.mask)
+                + sys.getsizeof(position.colors) + sys.getsizeof(position.slots))
+
+    def _retain(self, position):
+        self.size += self._cost(position)
+        ref = self._shared.get(id(position.rng))
+        if ref is None:
+            self._shared[id(position.rng)] = [position.rng, 1]
+            self.size += sys.getsizeof(position.rng)
+        else:
+            ref[1] += 1
+
+    def _release(self, position):
+        self.size -= self._cost(position)
+        key = id(position.rng)
+        ref = self._shared[key]
+        ref[1] -= 1
+        if not ref[1]:
+            del self._shared[key]
+            self.size -= sys.getsizeof(position.rng)
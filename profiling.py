@@ -0,0 +1,248 @@
+"""
+Профилирование горячих путей: счётчики и гистограммы задержек обработчиков.
+
+BLOCK_PUZZLE_PROFILE=1 — включить замеры и оверлей с запуска,
+BLOCK_PUZZLE_PROFILE=путь.json — то же и сохранить отчёт при выходе.
+F12 включает/выключает замеры и оверлей прямо в игре (отчёт тогда
+пишется в user_data_dir/profile.json).
+
+Оверлей показывает FPS, p50/p99 кадра и обработчиков и число
+диспетчеризаций свойств. Выключенный замер стоит одну проверку флага
+на вызов, подписки на свойства снимаются совсем.
+"""
+import functools
+import json
+import math
+import os
+import time
+
+PROFILE_ENV = 'BLOCK_PUZZLE_PROFILE'
+TOGGLE_KEY = 293  # F12
+BUCKETS_PER_OCTAVE = 4
+BUCKET_COUNT = 20 * BUCKETS_PER_OCTAVE + 1  # от 1 мкс до ~1 с
+OVERLAY_INTERVAL = 0.5
+
+enabled = False
+handlers = {}   # имя -> Histogram
+dispatches = {}  # 'Класс.свойство' -> число
+frames = None
+_watched = []   # [объект, свойства, колбэки или None]
+_overlay = None
+_events = []
+
+
+class Histogram:
+    """Логарифмическая гистограмма задержек: BUCKETS_PER_OCTAVE корзин на удвоение."""
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * BUCKET_COUNT
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        us = seconds * 1e6
+        i = int(math.log2(us) * BUCKETS_PER_OCTAVE) + 1 if us >= 1 else 0
+        self.buckets[min(i, BUCKET_COUNT - 1)] += 1
+
+    @staticmethod
+    def upper_bound(i):
+        """Верхняя граница корзины i в секундах."""
+        return 2 ** (i / BUCKETS_PER_OCTAVE) * 1e-6
+
+    def percentile(self, p):
+        """Оценка сверху с точностью до корзины (~19%), не больше максимума."""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(self.upper_bound(i), self.max)
+        return self.max
+
+    def as_dict(self):
+        ms = 1000
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * ms, 3),
+            'mean_ms': round(self.total * ms / self.count, 4) if self.count else 0,
+            'p50_ms': round(self.percentile(50) * ms, 4),
+            'p99_ms': round(self.percentile(99) * ms, 4),
+            'max_ms': round(self.max * ms, 4),
+            'buckets_us': {'%.1f' % (self.upper_bound(i) * 1e6): n
+                           for i, n in enumerate(self.buckets) if n},
+        }
+
+
+def timed(name):
+    """Декоратор: время каждого вызова попадает в гистограмму name."""
+    hist = handlers.setdefault(name, Histogram())
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.add(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def watch(obj, *props):
+    """Считать диспетчеризации свойств obj (подписка живёт, пока замеры включены)."""
+    entry = [obj, props, None]
+    _watched.append(entry)
+    if enabled:
+        _bind(entry)
+
+
+def _bind(entry):
+    obj, props, _ = entry
+    callbacks = []
+    for prop in props:
+        key = '%s.%s' % (type(obj).__name__, prop)
+        dispatches.setdefault(key, 0)
+
+        def on_dispatch(*args, key=key):
+            dispatches[key] += 1
+        obj.fbind(prop, on_dispatch)
+        callbacks.append(on_dispatch)
+    entry[2] = callbacks
+
+
+def _unbind(entry):
+    obj, props, callbacks = entry
+    if callbacks:
+        for prop, callback in zip(props, callbacks):
+            obj.funbind(prop, callback)
+    entry[2] = None
+
+
+def report():
+    from kivy.clock import Clock
+    return {
+        'fps': round(Clock.get_fps(), 1),
+        'frame': frames.as_dict() if frames else None,
+        'handlers': {name: h.as_dict() for name, h in handlers.items() if h.count},
+        'dispatches': {key: n for key, n in dispatches.items() if n},
+    }
+
+
+def overlay_text():
+    from kivy.clock import Clock
+    lines = ['FPS %.1f' % Clock.get_fps()]
+    if frames and frames.count:
+        lines[0] += '   frame p50 %.1f  p99 %.1f ms' % (frames.percentile(50) * 1000,
+                                                       frames.percentile(99) * 1000)
+    for name, h in handlers.items():
+        if h.count:
+            lines.append('%-28s %6d  p50 %7.3f  p99 %7.3f ms' % (
+                name, h.count, h.percentile(50) * 1000, h.percentile(99) * 1000))
+    for key, n in dispatches.items():
+        if n:
+            lines.append('%-28s %6d' % (key, n))
+    return '\n'.join(lines)
+
+
+def _on_frame(dt):
+    frames.add(dt)
+
+
+def _update_overlay(dt):
+    _overlay.text = overlay_text()
+
+
+def _make_overlay():
+    from kivy.core.window import Window
+    from kivy.graphics import Color, Rectangle
+    from kivy.metrics import dp
+    from kivy.uix.label import Label
+
+    label = Label(font_size=dp(11), font_name='RobotoMono-Regular', halign='left',
+                  valign='top', size_hint=(None, None), padding=(dp(6), dp(4)))
+    label.bind(texture_size=label.setter('size'))
+
+    def stick_to_top(*args):
+        label.pos = (0, Window.height - label.height)
+    label.bind(size=stick_to_top)
+    Window.bind(size=stick_to_top)
+    with label.canvas.before:
+        Color(0, 0, 0, 0.6)
+        background = Rectangle()
+    label.bind(pos=lambda *a: setattr(background, 'pos', label.pos),
+               size=lambda *a: setattr(background, 'size', label.size))
+    return label
+
+
+def enable():
+    global enabled, frames, _overlay
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    if enabled:
+        return
+    enabled = True
+    if frames is None:
+        frames = Histogram()
+    for entry in _watched:
+        _bind(entry)
+    if _overlay is None:
+        _overlay = _make_overlay()
+    Window.add_widget(_overlay)
+    _events.append(Clock.schedule_interval(_on_frame, 0))
+    _events.append(Clock.schedule_interval(_update_overlay, OVERLAY_INTERVAL))
+
+
+def disable():
+    global enabled
+    from kivy.core.window import Window
+    if not enabled:
+        return
+    enabled = False
+    for entry in _watched:
+        _unbind(entry)
+    while _events:
+        _events.pop().cancel()
+    Window.remove_widget(_overlay)
+
+
+def install():
+    """Вешает F12 и включает замеры, если задан BLOCK_PUZZLE_PROFILE."""
+    from kivy.core.window import Window
+
+    def on_key_down(window, key, *args):
+        if key == TOGGLE_KEY:
+            disable() if enabled else enable()
+            return True
+
+    Window.bind(on_key_down=on_key_down)
+    if os.environ.get(PROFILE_ENV):
+        enable()
+
+
+def dump(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, indent=1)
+
+
+def dump_at_exit(data_dir):
+    """Отчёт при выходе: в путь из BLOCK_PUZZLE_PROFILE или в data_dir/profile.json."""
+    if frames is None:
+        return  # замеры ни разу не включались
+    path = os.environ.get(PROFILE_ENV, '')
+    if not path.endswith('.json'):
+        path = os.path.join(data_dir, 'profile.json')
+    try:
+        dump(path)
+    except OSError:
+        pass
@@ -0,0 +1,181 @@
+"""
+Компактный бинарный реплей партии и безголовый проигрыватель.
+
+Файл только дописывается:
+    заголовок  '<4sBBBBIQ8s'  magic, версия, режим, размер поля, флаги,
+                              стартовая цель, сид, отпечаток каталога
+    ход        '<BBB'         слот, gx, gy
+    уровень    0xFE           переход уровня Adventure (когда он случился)
+    наклон     0xFD + '<b'    сложность раздачи в сотых (difficulty.py), с версии 2;
+                              пишется после события, вызвавшего раздачу, и только
+                              когда наклон изменился
+    конец      0xFF + '<I'    итоговый счёт
+
+Раздача фигур полностью определяется сидом и наклоном, поэтому снимки
+поля не нужны:
+
+    python main.py replay replays/*.bpr
+"""
+import argparse
+import random
+import struct
+import sys
+
+from dealer import FairDealer
+from engine import CATALOG_HASH, GRID_SIZE, START_TARGET, Game, RandomDealer
+
+MAGIC = b'BPRL'
+VERSION = 2
+HEADER = struct.Struct('<4sBBBBIQ8s')
+MOVE = struct.Struct('<BBB')
+SCORE = struct.Struct('<I')
+TILT = struct.Struct('<b')
+TILT_MARK = 0xFD
+TILT_UNITS = 100
+LEVEL_MARK = 0xFE
+END_MARK = 0xFF
+MODES = ('classic', 'adventure')
+FLAG_FAIR = 0x01  # раздача dealer.FairDealer
+EXTENSION = '.bpr'
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayWriter:
+    """Пишет реплей по ходу игры (каждая запись сразу уходит в файл)."""
+
+    def __init__(self, path, seed, mode, target_score=START_TARGET, size=GRID_SIZE,
+                 catalog=CATALOG_HASH, fair=False):
+        self.path = path
+        self.file = open(path, 'wb')
+        flags = FLAG_FAIR if fair else 0
+        self.file.write(HEADER.pack(MAGIC, VERSION, MODES.index(mode), size, flags,
+                                    target_score, seed, catalog))
+        self.file.flush()
+
+    @classmethod
+    def reopen(cls, path):
+        """Дописывать реплей дальше (партия продолжена из сохранения)."""
+        writer = cls.__new__(cls)
+        writer.path = path
+        writer.file = open(path, 'ab')
+        return writer
+
+    def place(self, slot, gx, gy):
+        self.file.write(MOVE.pack(slot, gx, gy))
+        self.file.flush()
+
+    def level_up(self):
+        self.file.write(bytes((LEVEL_MARK,)))
+        self.file.flush()
+
+    def tilt(self, tilt):
+        """Наклон следующей раздачи (уже квантованный difficulty.quantize)."""
+        self.file.write(bytes((TILT_MARK,)) + TILT.pack(round(tilt * TILT_UNITS)))
+        self.file.flush()
+
+    def finish(self, score):
+        self.file.write(bytes((END_MARK,)) + SCORE.pack(score))
+        self.close()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def parse(data):
+    """
+    bytes -> (заголовок dict, список событий, итоговый счёт или None).
+    Событие — ход (слот, gx, gy), None (переход уровня) или наклон раздачи (float).
+    """
+    if len(data) < HEADER.size:
+        raise ReplayError("Файл короче заголовка")
+    magic, version, mode, size, flags, target, seed, catalog = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ReplayError("Это не реплей")
+    if not 1 <= version <= VERSION:
+        raise ReplayError("Неизвестная версия реплея: %d" % version)
+    header = {'mode': MODES[mode], 'size': size, 'target_score': target,
+              'seed': seed, 'catalog': catalog, 'fair': bool(flags & FLAG_FAIR)}
+
+    events, final_score = [], None
+    pos = HEADER.size
+    while pos < len(data):
+        mark = data[pos]
+        if mark == LEVEL_MARK:
+            events.append(None)
+            pos += 1
+        elif mark == TILT_MARK and version >= 2:
+            if pos + 1 + TILT.size > len(data):
+                break
+            tilt, = TILT.unpack_from(data, pos + 1)
+            events.append(tilt / TILT_UNITS)
+            pos += 1 + TILT.size
+        elif mark == END_MARK:
+            final_score, = SCORE.unpack_from(data, pos + 1)
+            break
+        else:
+            if pos + MOVE.size > len(data):
+                break  # оборванная последняя запись (игру убили посреди записи)
+            events.append(MOVE.unpack_from(data, pos))
+            pos += MOVE.size
+    return header, events, final_score
+
+
+def replay(data, shapes=None):
+    """Восстанавливает партию из реплея. Возвращает (Game, итоговый счёт из файла)."""
+    header, events, final_score = parse(data)
+    if header['catalog'] != CATALOG_HASH or header['size'] != GRID_SIZE:
+        raise ReplayError("Реплей записан с другим каталогом фигур или размером поля")
+    dealer = FairDealer(shapes, header['size']) if header['fair'] else RandomDealer(shapes)
+    game = Game(header['mode'], rng=random.Random(header['seed']), shapes=shapes,
+                size=header['size'], target_score=header['target_score'], auto_level=False,
+                dealer=dealer)
+
+    # Наклон записан после события, вызвавшего раздачу, а движку он нужен до него
+    actions, tilts = [], {}
+    for event in events:
+        if isinstance(event, float):
+            tilts[len(actions) - 1] = event
+        else:
+            actions.append(event)
+    if -1 in tilts:
+        dealer.set_tilt(tilts[-1])
+    game.start()
+    for n, event in enumerate(actions):
+        if n in tilts:
+            dealer.set_tilt(tilts[n])
+        if event is None:
+            game.level_up()
+        elif game.place(*event) is None:
+            raise ReplayError("Ход %d (%d, %d, %d) невозможен" % ((n,) + event))
+    return game, final_score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py replay', description=__doc__.split('\n\n')[0])
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.files:
+        try:
+            with open(path, 'rb') as f:
+                game, expected = replay(f.read())
+        except (OSError, ReplayError) as e:
+            print("%s: ОШИБКА %s" % (path, e))
+            failed += 1
+            continue
+        if expected is not None and expected != game.score:
+            print("%s: СЧЁТ НЕ СОВПАЛ: в файле %d, пересчитано %d" % (path, expected, game.score))
+            failed += 1
+        else:
+            print("%s: ok, %s, ходов %d, счёт %d, уровень %d" % (
+                path, game.mode, game.moves, game.score, game.level))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Пакетная симуляция партий без окна.
+
+    python main.py simulate --games 10000 --workers 4 --seed 1 --policy greedy
+
+Партии идут по тем же правилам, что и GameScreen (engine.Game),
+раскидываются по пулу процессов, результаты печатаются JSON Lines.
+Сид каждой партии выводится из --seed и номера партии, поэтому
+результат не зависит от числа воркеров.
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import random
+import sys
+
+from dealer import FairDealer
+from engine import Game, clear_after, clear_mask, line_points
+from solver import Solver, popcount
+
+MAX_MOVES = 100000
+
+
+# --- ПОЛИТИКИ (как выбирать ход) ---
+# Политика получает игру и свой ГСЧ и возвращает (слот, gx, gy) или None.
+
+def policy_first(game, rng):
+    moves = game.legal_moves()
+    return moves[0][:3] if moves else None
+
+
+def policy_random(game, rng):
+    moves = game.legal_moves()
+    return rng.choice(moves)[:3] if moves else None
+
+
+def policy_greedy(game, rng):
+    """Максимум очков за ход прямо сейчас, ничьи — случайно."""
+    board = game.board
+    best, best_points = [], -1
+    for move in game.legal_moves():
+        lines, _ = clear_mask(board.mask | move[3], board.geo)
+        points = line_points(lines) + game.slots[move[0]].count
+        if points > best_points:
+            best, best_points = [move], points
+        elif points == best_points:
+            best.append(move)
+    return rng.choice(best)[:3] if best else None
+
+
+def policy_corner(game, rng):
+    """Ближе к углу поля, при равенстве — больше очков, дальше случайно."""
+    board = game.board
+    size = board.size
+    best, best_key = [], None
+    for move in game.legal_moves():
+        shape = game.slots[move[0]]
+        gx, gy = move[1], move[2]
+        corner = min(gx, size - gx - shape.width) + min(gy, size - gy - shape.height)
+        lines, _ = clear_mask(board.mask | move[3], board.geo)
+        key = (-corner, line_points(lines))
+        if best_key is None or key > best_key:
+            best, best_key = [move], key
+        elif key == best_key:
+            best.append(move)
+    return rng.choice(best)[:3] if best else None
+
+
+LOOKAHEAD_BEAM = 8
+
+
+def isolated_cells(mask, geo):
+    """Пустые клетки, у которых все соседи заняты (или стена): их почти не закрыть."""
+    size = geo.size
+    empty = geo.full & ~mask
+    not_first = geo.full & ~geo.col_masks[0]
+    not_last = geo.full & ~geo.col_masks[size - 1]
+    free_side = (((empty >> 1) & not_last) | ((empty << 1) & not_first)
+                 | (empty >> size) | ((empty << size) & geo.full))
+    return popcount(empty & ~free_side)
+
+
+def _lookahead(mask, items, depth, geo):
+    """
+    Лучшая цепочка до depth ходов из фигур в руке: (ключ, первый ход).
+    Ключ — (поставлено фигур, очки, -одиночных пустых, -занятых клеток).
+    """
+    candidates = []
+    for k, (slot, shape) in enumerate(items):
+        for gx, gy, m in shape.legal_placements(mask):
+            new_mask = mask | m
+            lines, cleared = clear_after(new_mask, m, geo)
+            new_mask &= ~cleared
+            points = line_points(lines) + shape.count
+            candidates.append(((1, points, -isolated_cells(new_mask, geo), -popcount(new_mask)),
+                               new_mask, (slot, gx, gy), k))
+    if not candidates:
+        return None
+    if depth <= 1 or len(items) == 1:
+        best = max(candidates, key=lambda c: c[0])
+        return best[0], best[2]
+
+    # Дальше смотрим только из LOOKAHEAD_BEAM лучших по оценке одного хода
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    best_key, best_move = None, None
+    for key, new_mask, move, k in candidates[:LOOKAHEAD_BEAM]:
+        sub = _lookahead(new_mask, items[:k] + items[k + 1:], depth - 1, geo)
+        if sub is not None:
+            sub_key = sub[0]
+            key = (key[0] + sub_key[0], key[1] + sub_key[1], sub_key[2], sub_key[3])
+        if best_key is None or key > best_key:
+            best_key, best_move = key, move
+    return best_key, best_move
+
+
+def policy_lookahead(game, rng, depth=2):
+    """Первый ход лучшей цепочки из depth фигур в руке (новую раздачу не угадывает)."""
+    items = [(i, s) for i, s in enumerate(game.slots) if s is not None]
+    best = _lookahead(game.board.mask, items, depth, game.board.geo)
+    return best[1] if best else None
+
+
+_solver = None
+SOLVER_NODES = 2000
+
+
+def policy_solver(game, rng):
+    """Первый ход плана solver.Solver (бюджет в узлах — результат детерминирован)."""
+    global _solver
+    if _solver is None:
+        _solver = Solver(game.board.size)
+    plan = _solver.solve(game.board.mask, game.slots, time_budget=None, node_limit=SOLVER_NODES)
+    return plan.moves[0] if plan else None
+
+
+POLICIES = {
+    'first': policy_first,
+    'random': policy_random,
+    'greedy': policy_greedy,
+    'corner': policy_corner,
+    'lookahead1': functools.partial(policy_lookahead, depth=1),
+    'lookahead2': functools.partial(policy_lookahead, depth=2),
+    'lookahead3': functools.partial(policy_lookahead, depth=3),
+    'solver': policy_solver,
+}
+
+
+def game_seed(seed, index):
+    """Сид партии index в серии с общим сидом seed."""
+    return seed * 1000003 + index
+
+
+_fair_dealer = None
+
+
+def fair_dealer():
+    """Один FairDealer на процесс, чтобы кеш решаемости жил между партиями."""
+    global _fair_dealer
+    if _fair_dealer is None:
+        _fair_dealer = FairDealer()
+    return _fair_dealer
+
+
+def play_game(mode, policy, seed, max_moves=MAX_MOVES, fair=False):
+    """Играет одну партию до конца и возвращает сыгравшую игру."""
+    # Спавн и политика тянут из разных ГСЧ, чтобы политики
+    # с одинаковым сидом получали одну и ту же раздачу. Сид политики —
+    # строка: целые CPython берёт по модулю, и ~seed совпал бы с seed + 1,
+    # то есть с раздачей следующей партии
+    game = Game(mode, rng=random.Random(seed), dealer=fair_dealer() if fair else None)
+    policy_rng = random.Random('policy:%d' % seed)
+    game.start()
+    while not game.over and game.moves < max_moves:
+        move = policy(game, policy_rng)
+        if move is None:
+            break
+        game.place(*move)
+    return game
+
+
+def _run_one(task):
+    index, seed, mode, policy_name, max_moves, fair = task
+    game = play_game(mode, POLICIES[policy_name], seed, max_moves, fair)
+    return {
+        'game': index,
+        'seed': seed,
+        'mode': mode,
+        'policy': policy_name,
+        'fair': fair,
+        'score': game.score,
+        'total_score': game.total_score,
+        'level': game.level,
+        'target_score': game.target_score,
+        'moves': game.moves,
+        'lines': game.lines,
+        'finished': game.over,
+    }
+
+
+def make_pool(workers):
+    # fork не переимпортирует main.py (а с ним и Kivy) в дочерних процессах
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork').Pool(workers)
+    return multiprocessing.Pool(workers)
+
+
+def run(games, workers, seed, mode, policy_name, max_moves=MAX_MOVES, fair=False):
+    """Генератор результатов в порядке номеров партий."""
+    tasks = ((i, game_seed(seed, i), mode, policy_name, max_moves, fair) for i in range(games))
+    if workers <= 1:
+        for task in tasks:
+            yield _run_one(task)
+        return
+    chunk = max(1, min(64, games // (workers * 8)))
+    with make_pool(workers) as pool:
+        for result in pool.imap(_run_one, tasks, chunksize=chunk):
+            yield result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='main.py simulate', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--mode', choices=('classic', 'adventure'), default='classic')
+    parser.add_argument('--max-moves', type=int, default=MAX_MOVES)
+    parser.add_argument('--fair', action='store_true', help='честная раздача (dealer.FairDealer)')
+    parser.add_argument('--out', help='файл для JSON Lines (по умолчанию stdout)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = open(args.out, 'w') if args.out else sys.stdout
+    try:
+        for result in run(args.games, args.workers, args.seed, args.mode, args.policy,
+                          args.max_moves, args.fair):
+            out.write(json.dumps(result) + '\n')
+            if result['game'] % 100 == 0:
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
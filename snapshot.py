@@ -0,0 +1,160 @@
+"""
+Снимок незаконченной партии: сохранить при паузе, продолжить после запуска.
+
+Формат (версия 3, little-endian):
+    заголовок  '<4sBBBBB8sIIQ'  magic, версия, режим, размер поля, флаги,
+                                бит на цвет, отпечаток каталога,
+                                счёт, цель уровня, сид партии
+    поле       ceil(size*size/8) байт — маска занятости (8x8 — одно слово)
+    цвета      цвета только занятых клеток, по «бит на цвет» (обычно 3)
+    слоты      3 байта — id фигур, 0xFF — пустой слот
+    ГСЧ        '<625I' + '<?d' — состояние random.Random (MT19937)
+    реплей     байт длины + имя файла реплея (utf-8), чтобы дописывать его дальше
+    партия     '<IIHd' ходы, очищенные линии, уровень, секунды игры — для статистики
+               (нет в версии 1: такие сохранения читаются с нулями)
+    итог       '<I' счёт всей партии: в Adventure счёт уровня обнуляется
+               (нет до версии 3: читается текущий счёт)
+
+Около 2.6 КБ, почти всё — состояние ГСЧ. Запись атомарная: временный
+файл и os.replace, так что оборванная запись не портит прошлый снимок.
+"""
+import os
+import struct
+from collections import namedtuple
+
+MAGIC = b'BPSV'
+VERSION = 3
+HEADER = struct.Struct('<4sBBBBB8sIIQ')
+RNG_WORDS = struct.Struct('<625I')
+RNG_GAUSS = struct.Struct('<?d')
+PROGRESS = struct.Struct('<IIHd')
+TOTAL = struct.Struct('<I')
+MODES = ('classic', 'adventure')
+FLAG_FAIR = 0x01
+FLAG_PRACTICE = 0x02
+EMPTY_SLOT = 0xFF
+MIN_COLOR_BITS = 3
+SAVE_NAME = 'save.bps'
+
+Snapshot = namedtuple('Snapshot', 'mode fair practice size catalog mask colors slots score '
+                                  'target_score seed rng_state replay moves lines level played '
+                                  'total_score',
+                      defaults=(0, 0, 1, 0.0, 0))
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def pack_rng(state):
+    """random.Random.getstate() -> bytes (2.5 КБ вместо ~20 КБ кортежа int)."""
+    _, words, gauss = state
+    return RNG_WORDS.pack(*words) + RNG_GAUSS.pack(gauss is not None, gauss or 0.0)
+
+
+def unpack_rng(data, pos=0):
+    words = RNG_WORDS.unpack_from(data, pos)
+    has_gauss, gauss = RNG_GAUSS.unpack_from(data, pos + RNG_WORDS.size)
+    return 3, words, gauss if has_gauss else None
+
+
+RNG_SIZE = RNG_WORDS.size + RNG_GAUSS.size
+
+
+def pack(snap):
+    """Snapshot -> bytes. colors — id цвета для каждой клетки поля (как Board.colors)."""
+    cells = snap.size * snap.size
+    filled = [i for i in range(cells) if snap.mask >> i & 1]
+    bits = max(MIN_COLOR_BITS, max((snap.colors[i] for i in filled), default=0).bit_length())
+    packed = 0
+    for n, i in enumerate(filled):
+        packed |= snap.colors[i] << (n * bits)
+
+    flags = (FLAG_FAIR if snap.fair else 0) | (FLAG_PRACTICE if snap.practice else 0)
+    replay = snap.replay.encode('utf-8')
+    return b''.join((
+        HEADER.pack(MAGIC, VERSION, MODES.index(snap.mode), snap.size, flags, bits, snap.catalog,
+                    snap.score, snap.target_score, snap.seed),
+        snap.mask.to_bytes((cells + 7) // 8, 'little'),
+        packed.to_bytes((len(filled) * bits + 7) // 8, 'little'),
+        bytes(EMPTY_SLOT if s is None else s for s in snap.slots),
+        pack_rng(snap.rng_state),
+        bytes((len(replay),)), replay,
+        PROGRESS.pack(snap.moves, snap.lines, snap.level, snap.played),
+        TOTAL.pack(snap.total_score),
+    ))
+
+
+def unpack(data, slot_count=3):
+    """bytes -> Snapshot."""
+    try:
+        (magic, version, mode, size, flags, bits, catalog,
+         score, target, seed) = HEADER.unpack_from(data)
+    except struct.error:
+        raise SnapshotError("Файл короче заголовка")
+    if magic != MAGIC:
+        raise SnapshotError("Это не сохранение")
+    if not 1 <= version <= VERSION:
+        raise SnapshotError("Неизвестная версия сохранения: %d" % version)
+    if mode >= len(MODES):
+        raise SnapshotError("Неизвестный режим: %d" % mode)
+    try:
+        cells = size * size
+        pos = HEADER.size
+        mask_len = (cells + 7) // 8
+        mask = int.from_bytes(data[pos:pos + mask_len], 'little')
+        pos += mask_len
+
+        filled = [i for i in range(cells) if mask >> i & 1]
+        colors_len = (len(filled) * bits + 7) // 8
+        packed = int.from_bytes(data[pos:pos + colors_len], 'little')
+        pos += colors_len
+        colors = bytearray(cells)
+        low = (1 << bits) - 1
+        for n, i in enumerate(filled):
+            colors[i] = packed >> (n * bits) & low
+
+        slots = tuple(None if s == EMPTY_SLOT else s for s in data[pos:pos + slot_count])
+        pos += slot_count
+        rng_state = unpack_rng(data, pos)
+        pos += RNG_SIZE
+        replay = data[pos + 1:pos + 1 + data[pos]]
+        if len(replay) != data[pos]:
+            raise IndexError
+        pos += 1 + len(replay)
+        replay = replay.decode('utf-8')
+        moves, lines, level, played = (PROGRESS.unpack_from(data, pos) if version >= 2
+                                       else (0, 0, 1, 0.0))
+        total, = (TOTAL.unpack_from(data, pos + PROGRESS.size) if version >= 3
+                  else (score,))
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise SnapshotError("Сохранение оборвано")
+
+    return Snapshot(mode=MODES[mode], fair=bool(flags & FLAG_FAIR),
+                    practice=bool(flags & FLAG_PRACTICE), size=size, catalog=catalog,
+                    mask=mask, colors=colors, slots=slots, score=score, target_score=target,
+                    seed=seed, rng_state=rng_state, replay=replay,
+                    moves=moves, lines=lines, level=level, played=played, total_score=total)
+
+
+def save(path, data, durable=False):
+    """Атомарная запись; durable=True — ещё и fsync (на паузе приложения)."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return unpack(f.read())
+
+
+def delete(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,170 @@
+"""
+Поиск лучшего хода для трёх фигур из слотов (подсказка и автоигра).
+
+Перебираются все порядки фигур и все точки установки, после каждой
+фигуры линии очищаются по правилам check_lines. Позиции кешируются
+по (маска поля, оставшиеся фигуры) в LRU-кеше: разные порядки часто
+приводят к одному и тому же полю.
+
+Полный перебор трёх фигур в Python — сотни тысяч узлов, поэтому у поиска
+есть бюджет (время и/или число узлов). Лучшие ходы пробуются первыми,
+и по истечении бюджета возвращается лучший найденный план.
+
+Бюджет времени — на весь solve(), включая жадный план. Часы смотрятся
+перед каждым раскрытием позиции (самое дорогое — сотня clear_after),
+так что перерасход — не больше одного раскрытия. HINT_BUDGET взят
+с запасом: подсказка и автоигра считаются в потоке интерфейса, а на
+слабом телефоне одно раскрытие в разы дольше, чем на десктопе.
+"""
+import time
+from collections import OrderedDict, namedtuple
+
+from engine import Geometry, GRID_SIZE, clear_after, line_points
+
+Plan = namedtuple('Plan', 'moves placed points')  # moves: [(слот, gx, gy), ...]
+
+HINT_BUDGET = 0.002
+CACHE_SIZE = 20000
+_CHECK_EVERY = 16
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+class Solver:
+    def __init__(self, size=GRID_SIZE, cache_size=CACHE_SIZE):
+        self.geo = Geometry(size)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.nodes = 0
+        self._deadline = None
+        self._node_limit = None
+        self._best_seen = None
+
+    def solve(self, board_mask, slots, time_budget=HINT_BUDGET, node_limit=None):
+        """
+        slots — фигуры в слотах (None для пустых). Возвращает Plan
+        с ходами в порядке установки или None, если не ставится ничего.
+        """
+        items = tuple(sorted(((s.id, i, s) for i, s in enumerate(slots) if s is not None),
+                             key=lambda t: t[0]))
+        if not items:
+            return None
+        self.nodes = 0
+        self._deadline = time.perf_counter() + time_budget if time_budget else None
+        self._node_limit = node_limit
+        # Жадный план — тоже за счёт бюджета
+        self._best_seen = self._greedy(board_mask, items)
+        try:
+            key, moves = self._search(board_mask, items, top=True)
+        except _OutOfBudget:
+            key, moves = self._best_seen
+            moves = self._bind_slots(moves, items)
+        if not moves:
+            return None
+        return Plan(moves=[(slot, gx, gy) for slot, gx, gy in moves], placed=key[0], points=key[1])
+
+    def _tick(self, expand=False):
+        """Узел поиска; expand — дальше раскрытие позиции, часы смотрим всегда."""
+        self.nodes += 1
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise _OutOfBudget
+        if (expand or self.nodes % _CHECK_EVERY == 0) and self._out_of_time():
+            raise _OutOfBudget
+
+    def _out_of_time(self):
+        return self._deadline is not None and time.perf_counter() > self._deadline
+
+    def _lookup(self, key):
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.cache.move_to_end(key)
+        return hit
+
+    def _store(self, key, value):
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _expand(self, mask, items):
+        """Все ходы из позиции: (очки, id фигуры, gx, gy, новое поле, остаток)."""
+        tried = set()
+        candidates = []
+        for pos, (shape_id, slot, shape) in enumerate(items):
+            if shape_id in tried:
+                continue
+            tried.add(shape_id)
+            rest = items[:pos] + items[pos + 1:]
+            for gx, gy, m in shape.legal_placements(mask):
+                new_mask = mask | m
+                lines, cleared = clear_after(new_mask, m, self.geo)
+                candidates.append((line_points(lines) + shape.count, shape_id, gx, gy,
+                                   new_mask & ~cleared, rest))
+        # Сначала ходы с очищением линий — так бюджет тратится с пользой
+        candidates.sort(key=lambda c: -c[0])
+        return candidates
+
+    def _greedy(self, mask, items):
+        """
+        Быстрый жадный план — ответ есть даже при нулевом бюджете: первый
+        ход делается всегда, следующие — пока не вышло время.
+        """
+        placed, points, plan = 0, 0, []
+        while items and not (plan and self._out_of_time()):
+            candidates = self._expand(mask, items)
+            if not candidates:
+                break
+            gain, shape_id, gx, gy, mask, items = max(
+                candidates, key=lambda c: (c[0], -popcount(c[4])))
+            placed += 1
+            points += gain
+            plan.append((shape_id, gx, gy))
+        return (placed, points, -popcount(mask)), plan
+
+    def _search(self, mask, items, top=False):
+        """
+        Лучший (ключ, ходы) из позиции. Ключ — (поставлено фигур, очки,
+        -занятых клеток в конце): сначала выжить, потом очки, потом чистота.
+        """
+        cache_key = (mask, tuple(t[0] for t in items))
+        hit = self._lookup(cache_key)
+        if hit is not None:
+            # В кеше ходы хранятся по id фигур, слоты подставляются наверху
+            key, plan = hit
+            return key, self._bind_slots(plan, items) if top else plan
+
+        best_key = (0, 0, -popcount(mask))
+        best_plan = []
+        for points, shape_id, gx, gy, new_mask, rest in self._expand(mask, items):
+            self._tick(expand=bool(rest))
+            if rest:
+                sub_key, sub_plan = self._search(new_mask, rest)
+            else:
+                sub_key, sub_plan = (0, 0, -popcount(new_mask)), []
+            key = (sub_key[0] + 1, sub_key[1] + points, sub_key[2])
+            if key > best_key:
+                best_key = key
+                best_plan = [(shape_id, gx, gy)] + sub_plan
+                if top and key > self._best_seen[0]:
+                    self._best_seen = (key, best_plan)
+
+        self._store(cache_key, (best_key, best_plan))
+        return best_key, self._bind_slots(best_plan, items) if top else best_plan
+
+    @staticmethod
+    def _bind_slots(plan, items):
+        """[(shape_id, gx, gy)] -> [(слот, gx, gy)] по фигурам из items."""
+        free = [(shape_id, slot) for shape_id, slot, _ in items]
+        bound = []
+        for shape_id, gx, gy in plan:
+            for k, (sid, slot) in enumerate(free):
+                if sid == shape_id:
+                    bound.append((slot, gx, gy))
+                    del free[k]
+                    break
+        return bound
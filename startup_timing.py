@@ -0,0 +1,44 @@
+"""
+Замеры холодного старта: импорты, загрузка KV, первый кадр.
+
+Время считается от импорта этого модуля (первая строка main.py), в мс.
+BLOCK_PUZZLE_TIMING=путь.json — дописать замеры в файл (JSON Lines),
+BLOCK_PUZZLE_TIMING_EXIT=1 — закрыть приложение после первого кадра
+(так benchmarks/bench_startup.py гоняет старт много раз подряд).
+"""
+import json
+import os
+import time
+
+TIMING_ENV = 'BLOCK_PUZZLE_TIMING'
+EXIT_ENV = 'BLOCK_PUZZLE_TIMING_EXIT'
+
+T0 = time.perf_counter()
+marks = {}
+
+
+def mark(name):
+    marks[name] = round((time.perf_counter() - T0) * 1000, 2)
+
+
+def watch_first_frame(app):
+    """Отмечает первый кадр (первый flip окна) и пишет отчёт."""
+    from kivy.core.window import Window
+
+    def on_flip(*args):
+        Window.unbind(on_flip=on_flip)
+        mark('first_frame')
+        report()
+        if os.environ.get(EXIT_ENV):
+            app.stop()
+
+    Window.bind(on_flip=on_flip)
+
+
+def report():
+    from kivy.logger import Logger
+    Logger.info('Startup: %s', ', '.join('%s=%.1fms' % kv for kv in marks.items()))
+    path = os.environ.get(TIMING_ENV)
+    if path:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(marks) + '\n')
@@ -0,0 +1,231 @@
+"""
+История партий и статистика: локальная база SQLite в режиме WAL.
+
+Записи — законченные партии ('game') и пройденные уровни приключения
+('level'): счёт, ходы, очищенные линии, время игры. Пишет их только
+фоновый поток: record() кладёт кортеж в очередь и сразу возвращается,
+поток сбрасывает накопленное пачкой в одной транзакции — по BATCH_SIZE
+записей, раз в FLUSH_INTERVAL секунд или по flush()/close().
+
+Для экрана статистики ничего не считается по всей истории: в той же
+транзакции обновляются сводка по режиму (лучший счёт, суммы, серия дней
+подряд) и счётчики партий по каждому значению счёта, из которых берутся
+процентили. Запрос тоже идёт через очередь, после уже принятых записей,
+и отвечает колбэком из фонового потока.
+"""
+import datetime
+import queue
+import sqlite3
+import threading
+import time
+
+STATS_NAME = 'stats.db'
+SCHEMA_VERSION = 1
+BATCH_SIZE = 32
+FLUSH_INTERVAL = 2.0
+PERCENTILES = (50, 90, 99)
+RECENT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    level INTEGER NOT NULL,
+    fair INTEGER NOT NULL,
+    ended_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_recent ON records (kind, mode, ended_at);
+CREATE TABLE IF NOT EXISTS summary (
+    mode TEXT PRIMARY KEY,
+    games INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    total_moves INTEGER NOT NULL,
+    total_lines INTEGER NOT NULL,
+    total_duration REAL NOT NULL,
+    levels INTEGER NOT NULL,
+    best_level INTEGER NOT NULL,
+    last_day INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    best_streak INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS score_counts (
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (mode, score)
+) WITHOUT ROWID;
+"""
+
+SUMMARY_FIELDS = ('games', 'best_score', 'total_score', 'total_moves', 'total_lines',
+                  'total_duration', 'levels', 'best_level', 'last_day', 'streak', 'best_streak')
+
+_FLUSH = object()
+_CLOSE = object()
+
+
+class _Query:
+    __slots__ = ('mode', 'callback')
+
+    def __init__(self, mode, callback):
+        self.mode = mode
+        self.callback = callback
+
+
+def day_number(timestamp):
+    """Номер локального календарного дня (для серии дней подряд)."""
+    return datetime.date.fromtimestamp(timestamp).toordinal()
+
+
+def percentiles(counts, ps=PERCENTILES):
+    """[(счёт, число партий)] по возрастанию -> {p: счёт} (ближайший ранг)."""
+    total = sum(n for _, n in counts)
+    result = {}
+    if not total:
+        return result
+    seen = 0
+    targets = sorted(ps)
+    k = 0
+    for score, n in counts:
+        seen += n
+        while k < len(targets) and seen >= total * targets[k] / 100:
+            result[targets[k]] = score
+            k += 1
+    return result
+
+
+class StatsStore:
+    def __init__(self, path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='stats-writer', daemon=True)
+        self.thread.start()
+
+    # --- ПОТОК ИНТЕРФЕЙСА ---
+
+    def record(self, kind, mode, score, moves, lines, duration, level=1, fair=False):
+        """Партия ('game') или уровень ('level'); не ждёт диска."""
+        self.queue.put((kind, mode, int(score), int(moves), int(lines), float(duration),
+                        int(level), int(bool(fair)), time.time()))
+
+    def flush(self):
+        """Попросить записать накопленное сейчас (на паузе приложения)."""
+        self.queue.put(_FLUSH)
+
+    def query(self, mode, callback):
+        """callback(dict) из фонового потока, уже с учётом всех принятых записей."""
+        self.queue.put(_Query(mode, callback))
+
+    def close(self, timeout=2.0):
+        """Дописывает очередь и закрывает базу (при выходе из приложения)."""
+        if self.thread.is_alive():
+            self.queue.put(_CLOSE)
+            self.thread.join(timeout)
+
+    # --- ФОНОВЫЙ ПОТОК ---
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute('PRAGMA journal_mode=WAL')
+        # В WAL обычной синхронизации достаточно: оборвётся максимум последняя пачка
+        db.execute('PRAGMA synchronous=NORMAL')
+        if db.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+            db.executescript(SCHEMA)
+            db.execute('PRAGMA user_version=%d' % SCHEMA_VERSION)
+        return db
+
+    def _run(self):
+        try:
+            db = self._connect()
+        except sqlite3.Error:
+            db = None  # статистика не должна ломать игру: просто не пишем
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH
+            if isinstance(item, tuple):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+            if batch and db is not None:
+                self._write(db, batch)
+            batch = []
+            deadline = None
+            if item is _CLOSE:
+                break
+            if isinstance(item, _Query):
+                item.callback(self._summary(db, item.mode) if db is not None else None)
+        if db is not None:
+            db.close()
+
+    def _write(self, db, batch):
+        try:
+            with db:
+                db.executemany('INSERT INTO records (kind, mode, score, moves, lines, duration, '
+                               'level, fair, ended_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+                for mode in {r[1] for r in batch}:
+                    self._update_summary(db, mode, [r for r in batch if r[1] == mode])
+        except sqlite3.Error:
+            pass
+
+    def _update_summary(self, db, mode, batch):
+        row = db.execute('SELECT %s FROM summary WHERE mode = ?' % ', '.join(SUMMARY_FIELDS),
+                         (mode,)).fetchone()
+        s = dict(zip(SUMMARY_FIELDS, row or (0,) * len(SUMMARY_FIELDS)))
+        counts = {}
+        for kind, _, score, moves, lines, duration, level, _, ended_at in batch:
+            if kind == 'level':
+                s['levels'] += 1
+                s['best_level'] = max(s['best_level'], level + 1)
+                continue
+            s['games'] += 1
+            s['best_score'] = max(s['best_score'], score)
+            s['total_score'] += score
+            s['total_moves'] += moves
+            s['total_lines'] += lines
+            s['total_duration'] += duration
+            s['best_level'] = max(s['best_level'], level)
+            counts[score] = counts.get(score, 0) + 1
+            day = day_number(ended_at)
+            if day != s['last_day']:
+                s['streak'] = s['streak'] + 1 if day == s['last_day'] + 1 else 1
+                s['last_day'] = day
+                s['best_streak'] = max(s['best_streak'], s['streak'])
+        db.execute('INSERT OR REPLACE INTO summary (mode, %s) VALUES (?%s)' % (
+            ', '.join(SUMMARY_FIELDS), ', ?' * len(SUMMARY_FIELDS)),
+            (mode,) + tuple(s[f] for f in SUMMARY_FIELDS))
+        db.executemany('INSERT INTO score_counts (mode, score, n) VALUES (?, ?, ?) '
+                       'ON CONFLICT (mode, score) DO UPDATE SET n = n + excluded.n',
+                       [(mode, score, n) for score, n in counts.items()])
+
+    def _summary(self, db, mode):
+        try:
+            row = db.execute('SELECT %s FROM summary WHERE mode = ?' % ', '.join(SUMMARY_FIELDS),
+                             (mode,)).fetchone()
+            counts = db.execute('SELECT score, n FROM score_counts WHERE mode = ? ORDER BY score',
+                                (mode,)).fetchall()
+            recent = db.execute('SELECT score FROM records WHERE kind = ? AND mode = ? '
+                                'ORDER BY ended_at DESC LIMIT ?', ('game', mode, RECENT)).fetchall()
+        except sqlite3.Error:
+            return None
+        s = dict(zip(SUMMARY_FIELDS, row or (0,) * len(SUMMARY_FIELDS)))
+        # Серия прервана, если вчера и сегодня партий не было
+        if day_number(time.time()) > s['last_day'] + 1:
+            s['streak'] = 0
+        s['mode'] = mode
+        s['percentiles'] = percentiles(counts)
+        s['recent'] = [score for score, in recent]
+        return s
@@ -0,0 +1,95 @@
+"""
+Экран статистики: лучший счёт, процентили, серии дней по режиму.
+
+Данные приходят из stats.StatsStore колбэком фонового потока, так что
+экран открывается сразу, а цифры появляются, как только их прочтут.
+"""
+from kivy.app import App
+from kivy.clock import mainthread
+from kivy.lang import Builder
+from kivy.properties import StringProperty
+from kivy.uix.screenmanager import Screen
+
+KV = """
+<StatsScreen>:
+    canvas.before:
+        Color:
+            rgba: 0.1, 0.1, 0.15, 1
+        Rectangle:
+            pos: self.pos
+            size: self.size
+
+    BoxLayout:
+        orientation: 'vertical'
+        padding: dp(20)
+        spacing: dp(10)
+
+        BoxLayout:
+            size_hint_y: None
+            height: dp(50)
+            spacing: dp(10)
+            SimpleButton:
+                text: "Classic"
+                background_color: (0.2, 0.6, 1, 1) if root.mode == 'classic' else (0.3, 0.3, 0.4, 1)
+                on_release: root.show_mode('classic')
+            SimpleButton:
+                text: "Adventure"
+                background_color: (1, 0.5, 0, 1) if root.mode == 'adventure' else (0.3, 0.3, 0.4, 1)
+                on_release: root.show_mode('adventure')
+
+        Label:
+            text: root.text
+            font_size: dp(18)
+            halign: 'left'
+            valign: 'top'
+            text_size: self.size
+
+        SimpleButton:
+            text: "MENU"
+            background_color: 0.3, 0.3, 0.4, 1
+            on_release: root.manager.current = 'menu'
+"""
+Builder.load_string(KV)
+
+
+def format_duration(seconds):
+    minutes = int(seconds) // 60
+    return '%d:%02d' % divmod(minutes, 60)
+
+
+def format_stats(s):
+    if not s or not s['games']:
+        return "No finished games yet"
+    p = s['percentiles']
+    lines = [
+        "Games: %d" % s['games'],
+        "Best score: %d" % s['best_score'],
+        "Average: %d    Median: %d" % (s['total_score'] / s['games'], p[50]),
+        "Top 10%%: %d    Top 1%%: %d" % (p[90], p[99]),
+        "Lines cleared: %d" % s['total_lines'],
+        "Time played: %s" % format_duration(s['total_duration']),
+        "Day streak: %d (best %d)" % (s['streak'], s['best_streak']),
+    ]
+    if s['mode'] == 'adventure':
+        lines.append("Best level: %d    Levels cleared: %d" % (s['best_level'], s['levels']))
+    if s['recent']:
+        lines.append("Recent: " + ", ".join(map(str, s['recent'])))
+    return "\n".join(lines)
+
+
+class StatsScreen(Screen):
+    mode = StringProperty('classic')
+    text = StringProperty('')
+
+    def on_pre_enter(self):
+        # Запрос уходит до анимации перехода, ответ обычно успевает к её концу
+        self.show_mode(self.mode)
+
+    def show_mode(self, mode):
+        self.mode = mode
+        App.get_running_app().stats_store().query(mode, self.on_stats)
+
+    @mainthread
+    def on_stats(self, summary):
+        if summary is None or summary['mode'] == self.mode:
+            self.text = format_stats(summary)
@@ -0,0 +1,257 @@
+"""
+Телеметрия игры: поток событий для анализа (перетаскивание, призрак,
+ходы, линии, раздачи, конец игры).
+
+BLOCK_PUZZLE_TELEMETRY не задан или 'file' — писать в user_data_dir/telemetry
+(JSON Lines в gzip с ротацией), =http://хост:порт/путь — отправлять пачками
+на локальный сборщик, =0 — выключить. Сборщик для отладки:
+
+    python main.py telemetry collect --port 8765 --out events.jsonl
+
+emit() только кладёт кортеж (время, код, a, b, c) в кольцевой буфер
+постоянного размера: ни словарей, ни ввода-вывода в потоке интерфейса.
+Фоновый поток раз в FLUSH_INTERVAL (или когда буфер заполнен наполовину)
+забирает накопленное и отдаёт приёмнику. Если поток не успевает, старые
+события перезаписываются и считаются в dropped. Стоимость emit()
+проверяет benchmarks/bench_telemetry.py (EVENT_BUDGET_NS).
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from time import perf_counter
+
+TELEMETRY_ENV = 'BLOCK_PUZZLE_TELEMETRY'
+CAPACITY = 4096  # степень двойки: индекс в кольце — head & (CAPACITY - 1)
+FLUSH_INTERVAL = 2.0
+MAX_FILE_BYTES = 256 * 1024
+KEEP_FILES = 4
+FILE_NAME = 'telemetry.jsonl.gz'
+EVENT_BUDGET_NS = 2000
+
+# Коды событий: имя и что лежит в a, b, c
+DRAG_START = 1
+DRAG_END = 2
+GHOST = 3
+PLACE = 4
+LINES = 5
+SPAWN = 6
+GAME_OVER = 7
+EVENTS = {
+    DRAG_START: ('drag_start', 'slot', 'shape', None),
+    DRAG_END: ('drag_end', 'slot', 'gx', 'gy'),
+    GHOST: ('ghost', 'gx', 'gy', 'ok'),
+    PLACE: ('place', 'shape', 'gx', 'gy'),
+    LINES: ('lines', 'lines', 'points', 'score'),
+    SPAWN: ('spawn', 'shape1', 'shape2', 'shape3'),
+    GAME_OVER: ('game_over', 'score', 'moves', 'level'),
+}
+
+_MASK = CAPACITY - 1
+_HALF = CAPACITY // 2
+
+enabled = False
+dropped = 0
+_ring = [None] * CAPACITY
+_head = 0  # всего записано (пишет только поток интерфейса)
+_tail = 0  # всего забрано (пишет только фоновый поток)
+_sink = None
+_session = ''
+_clock_offset = 0.0  # time.time() - perf_counter()
+_wake = threading.Event()
+_thread = None
+_stopping = False
+
+
+def emit(code, a=0, b=0, c=0):
+    """Событие в кольцевой буфер; без приёмника или с выключенной телеметрией — ничего."""
+    global _head
+    if not enabled:
+        return
+    head = _head
+    _ring[head & _MASK] = (perf_counter(), code, a, b, c)
+    _head = head + 1
+    if head - _tail == _HALF:
+        _wake.set()
+
+
+# --- ПРИЁМНИКИ ---
+
+class FileSink:
+    """
+    JSON Lines в gzip: каждая пачка дописывается отдельным gzip-членом,
+    так что оборванная запись портит только её. Файл больше max_bytes
+    переименовывается с отметкой времени, хранятся последние keep.
+    """
+    def __init__(self, folder, max_bytes=MAX_FILE_BYTES, keep=KEEP_FILES):
+        self.folder = folder
+        self.path = os.path.join(folder, FILE_NAME)
+        self.max_bytes = max_bytes
+        self.keep = keep
+
+    def write(self, lines):
+        os.makedirs(self.folder, exist_ok=True)
+        with gzip.open(self.path, 'ab') as f:
+            f.write(''.join(line + '\n' for line in lines).encode('utf-8'))
+        if os.path.getsize(self.path) > self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        stem = FILE_NAME.split('.')[0]
+        os.replace(self.path, os.path.join(self.folder, '%s-%d.jsonl.gz' % (
+            stem, time.time() * 1000)))
+        old = sorted(f for f in os.listdir(self.folder) if f.startswith(stem + '-'))
+        for name in old[:max(0, len(old) - self.keep)]:
+            os.remove(os.path.join(self.folder, name))
+
+
+class HttpSink:
+    """POST пачки (JSON Lines, gzip) на сборщик; недоставленная пачка теряется."""
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def write(self, lines):
+        import urllib.request  # тяжёлый импорт — только если выбран этот приёмник
+        body = gzip.compress(''.join(line + '\n' for line in lines).encode('utf-8'))
+        request = urllib.request.Request(self.url, data=body, headers={
+            'Content-Type': 'application/x-ndjson', 'Content-Encoding': 'gzip'})
+        urllib.request.urlopen(request, timeout=self.timeout).close()
+
+
+def make_sink(data_dir):
+    """Приёмник по BLOCK_PUZZLE_TELEMETRY или None (выключено)."""
+    value = os.environ.get(TELEMETRY_ENV, 'file')
+    if value in ('0', 'off', ''):
+        return None
+    if value.startswith(('http://', 'https://')):
+        return HttpSink(value)
+    return FileSink(os.path.join(data_dir, 'telemetry'))
+
+
+# --- ФОНОВЫЙ ПОТОК ---
+
+def as_json(event):
+    t, code, a, b, c = event
+    name, *fields = EVENTS[code]
+    record = {'t': round(_clock_offset + t, 4), 'event': name, 'session': _session}
+    for field, value in zip(fields, (a, b, c)):
+        if field:
+            record[field] = value
+    return json.dumps(record, separators=(',', ':'))
+
+
+def collect():
+    """Забирает накопленное из кольца (зовёт фоновый поток)."""
+    global _tail, dropped
+    head = _head
+    start = max(_tail, head - CAPACITY)
+    batch = [_ring[i & _MASK] for i in range(start, head)]
+    # Пока копировали, emit мог обогнать кольцо и переписать самые старые
+    overrun = _head - CAPACITY - start
+    if overrun > 0:
+        batch = batch[overrun:]
+        start += overrun
+    dropped += start - _tail
+    _tail = head
+    return batch
+
+
+def flush_now():
+    batch = collect()
+    if batch and _sink is not None:
+        try:
+            _sink.write([as_json(e) for e in batch])
+        except OSError:
+            pass  # телеметрия не должна ломать игру
+
+
+def _run():
+    while not _stopping:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        flush_now()
+    # stop() мог прийти во время записи: события, набежавшие за неё, — здесь
+    flush_now()
+
+
+def start(sink):
+    global enabled, _sink, _session, _clock_offset, _thread, _stopping
+    if enabled or sink is None:
+        return
+    _sink = sink
+    _session = uuid.uuid4().hex[:12]
+    _clock_offset = time.time() - perf_counter()
+    _stopping = False
+    _thread = threading.Thread(target=_run, name='telemetry', daemon=True)
+    _thread.start()
+    enabled = True
+
+
+def install(data_dir):
+    """Включает телеметрию с приёмником из окружения (первый переход в игру)."""
+    start(make_sink(data_dir))
+
+
+def flush():
+    """Попросить фоновый поток сбросить буфер сейчас (на паузе приложения)."""
+    _wake.set()
+
+
+def stop(timeout=2.0):
+    """Последний сброс и остановка потока (App.on_stop)."""
+    global enabled, _stopping
+    if not enabled:
+        return
+    enabled = False
+    _stopping = True
+    _wake.set()
+    _thread.join(timeout)
+
+
+# --- СБОРЩИК ДЛЯ ОТЛАДКИ ---
+
+def serve(port, out):
+    """Локальный HTTP-сборщик: дописывает присланные пачки в out (JSON Lines)."""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            with open(out, 'ab') as f:
+                f.write(body)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', port), Handler)
+    print("Сборщик на http://127.0.0.1:%d/ -> %s" % (port, out))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py telemetry', description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    collector = commands.add_parser('collect', help='локальный HTTP-сборщик событий')
+    collector.add_argument('--port', type=int, default=8765)
+    collector.add_argument('--out', default='telemetry.jsonl')
+    args = parser.parse_args(argv)
+    serve(args.port, args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Таблицы масок фигур (Shape.placements) против старой поклеточной
+проверки на случайных полях всех размеров.
+
+    python -m pytest tests
+"""
+import copy
+import random
+
+import pytest
+
+from engine import (SHAPES_DEF, SLOT_COUNT, Board, Geometry, catalog_hash, clear_mask,
+                    compile_shapes)
+
+SIZES = (8, 10, 12)
+FILLS = (0.25, 0.5, 0.75)
+BOARDS = 200  # полей на каждый размер и заполненность
+
+
+def loop_fits(mask, size, shape, gx, gy):
+    """Старая проверка: клетка за клеткой, с выходом за край поля."""
+    for bx, by in shape.coords:
+        x, y = gx + bx, gy + by
+        if not (0 <= x < size and 0 <= y < size) or mask >> (y * size + x) & 1:
+            return False
+    return True
+
+
+def loop_fits_anywhere(mask, size, shape):
+    return any(loop_fits(mask, size, shape, gx, gy)
+               for gx in range(size) for gy in range(size))
+
+
+def random_board(size, fill, rng):
+    """Поле без полных линий — как между ходами в игре."""
+    mask = 0
+    for i in range(size * size):
+        if rng.random() < fill:
+            mask |= 1 << i
+    _, cleared = clear_mask(mask, Geometry(size))
+    return mask & ~cleared
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('fill', FILLS)
+def test_placement_tables_match_cell_loop(size, fill):
+    shapes = compile_shapes(SHAPES_DEF, size)
+    board = Board(size)
+    rng = random.Random('tables:%d:%s' % (size, fill))
+    for _ in range(BOARDS):
+        board.mask = mask = random_board(size, fill, rng)
+        expected = {s.id: loop_fits_anywhere(mask, size, s) for s in shapes}
+        for shape in shapes:
+            assert shape.fits_anywhere(mask) == expected[shape.id]
+            gx, gy = rng.randrange(-1, size), rng.randrange(-1, size)
+            assert board.fits(shape, gx, gy) == loop_fits(mask, size, shape, gx, gy)
+        triple = rng.sample(shapes, SLOT_COUNT)
+        assert board.can_place_any(triple) == any(expected[s.id] for s in triple)
+
+
+def test_legal_placements_are_exactly_the_fitting_origins():
+    size = 8
+    shapes = compile_shapes(SHAPES_DEF, size)
+    rng = random.Random('legal')
+    for _ in range(BOARDS):
+        mask = random_board(size, rng.random(), rng)
+        for shape in shapes:
+            legal = {(gx, gy) for gx, gy, _ in shape.legal_placements(mask)}
+            expected = {(gx, gy) for gx in range(size) for gy in range(size)
+                        if loop_fits(mask, size, shape, gx, gy)}
+            assert legal == expected
+
+
+def test_catalog_hash_covers_weights():
+    """Другие частоты раздачи — другой каталог для реплеев и сохранений."""
+    base = catalog_hash(compile_shapes(SHAPES_DEF))
+    shapes_def = copy.deepcopy(SHAPES_DEF)
+    shapes_def[0]['weight'] = 3
+    assert catalog_hash(compile_shapes(shapes_def)) != base
+    shapes_def[0]['weight'] = 1
+    assert catalog_hash(compile_shapes(shapes_def)) == base
@@ -0,0 +1,32 @@
+"""
+Снимок партии: круговая упаковка и чтение сохранений прошлых версий.
+
+    python -m pytest tests
+"""
+import random
+
+import snapshot
+
+
+def make_snapshot(**kwargs):
+    colors = bytearray(64)
+    colors[0] = colors[9] = 5
+    fields = dict(mode='adventure', fair=True, practice=False, size=8, catalog=b'12345678',
+                  mask=(1 << 0) | (1 << 9), colors=colors, slots=(3, None, 7),
+                  score=40, target_score=750, seed=12345,
+                  rng_state=random.Random(1).getstate(), replay='1_adventure.bpr',
+                  moves=21, lines=4, level=3, played=95.5, total_score=1640)
+    fields.update(kwargs)
+    return snapshot.Snapshot(**fields)
+
+
+def test_round_trip():
+    snap = make_snapshot()
+    assert snapshot.unpack(snapshot.pack(snap)) == snap
+
+
+def test_version_2_reads_level_score_as_total():
+    data = bytearray(snapshot.pack(make_snapshot()))[:-snapshot.TOTAL.size]
+    data[4] = 2
+    snap = snapshot.unpack(bytes(data))
+    assert (snap.level, snap.moves, snap.score, snap.total_score) == (3, 21, 40, 40)
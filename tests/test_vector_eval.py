@@ -0,0 +1,58 @@
+"""
+vector_eval.evaluate против движка (Board.clear_lines и
+Board.can_place_any — то, что зовут check_lines и check_game_over)
+и против старого поклеточного цикла на случайных полях.
+
+NumPy в сборку приложения не входит: без него тест пропускается.
+"""
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import vector_eval  # noqa: E402
+from benchmarks.bench_vector_eval import (  # noqa: E402
+    loop_check_lines, loop_shape_fits, random_boards, to_cells)
+from engine import GRID_SIZE, SHAPES, Board, line_points  # noqa: E402
+
+BOARDS = 1000
+
+
+@pytest.fixture(scope='module')
+def boards():
+    return random_boards(BOARDS, random.Random('vector_eval'))
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_evaluate_matches_engine(boards, packed):
+    result = vector_eval.evaluate(vector_eval.pack(boards) if packed else boards)
+    board = Board(GRID_SIZE)
+    for i, cells in enumerate(boards):
+        mask = int(vector_eval.pack(cells[None])[0])
+        board.mask = mask
+        rows, cols = board.full_lines()
+        assert list(np.flatnonzero(result.rows_full[i])) == rows
+        assert list(np.flatnonzero(result.cols_full[i])) == cols
+        lines, _ = board.clear_lines()
+        assert result.lines[i] == lines
+        assert result.points[i] == line_points(lines)
+        board.mask = mask
+        for k, shape in enumerate(SHAPES):
+            assert bool(result.fits[i, k]) == board.can_place_any([shape])
+
+
+def test_evaluate_matches_cell_loop(boards):
+    result = vector_eval.evaluate(boards)
+    for i, board in enumerate(boards):
+        cells = to_cells(board)
+        rows, cols, points = loop_check_lines(cells)
+        assert list(np.flatnonzero(result.rows_full[i])) == rows
+        assert list(np.flatnonzero(result.cols_full[i])) == cols
+        assert result.points[i] == points
+        for k, shape in enumerate(SHAPES):
+            assert bool(result.fits[i, k]) == loop_shape_fits(cells, shape)
+
+
+def test_pack_unpack_round_trip(boards):
+    assert (vector_eval.unpack(vector_eval.pack(boards)) == boards).all()
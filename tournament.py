@@ -0,0 +1,251 @@
+"""
+Турнир политик: каждая играет одни и те же партии (те же сиды).
+
+    python main.py tournament --games 20000 --policies greedy corner lookahead2 \
+        --checkpoint run.jsonl --json summary.json
+
+Партии раскидываются по пулу процессов (как в simulate). Сравнение
+парное: на одинаковых сидах раздача совпадает, поэтому разница
+политик видна с куда меньшим числом партий, чем при независимых сериях.
+
+Результаты каждой партии дописываются в --checkpoint (JSON Lines, первая
+строка — параметры турнира). Прерванный прогон с тем же файлом
+продолжается с места остановки; --games и --policies можно и увеличить.
+
+Сводка: среднее и медиана очков (total_score), длины партии в ходах
+и достигнутого уровня с 95% доверительными интервалами, плюс
+попарные победы и средняя разница очков на общих сидах.
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+
+import simulate
+
+DEFAULT_POLICIES = ('greedy', 'corner', 'lookahead2')
+Z95 = 1.959964
+FLUSH_EVERY = 100
+CONFIG_KEYS = ('seed', 'mode', 'fair', 'max_moves')
+
+
+class CheckpointError(Exception):
+    pass
+
+
+# --- СТАТИСТИКА ---
+
+def mean_ci(values):
+    """Среднее и 95% интервал (нормальное приближение): (среднее, низ, верх)."""
+    m = statistics.fmean(values)
+    if len(values) < 2:
+        return m, m, m
+    half = Z95 * statistics.stdev(values) / math.sqrt(len(values))
+    return m, m - half, m + half
+
+
+def median_ci(values):
+    """Медиана и 95% интервал по порядковым статистикам (без предположений о распределении)."""
+    s = sorted(values)
+    n = len(s)
+    half = Z95 * math.sqrt(n) / 2
+    lo = max(0, math.floor(n / 2 - half))
+    hi = min(n - 1, math.ceil(n / 2 + half))
+    return statistics.median(s), s[lo], s[hi]
+
+
+def describe(values):
+    mean, mean_lo, mean_hi = mean_ci(values)
+    median, median_lo, median_hi = median_ci(values)
+    return {
+        'mean': round(mean, 2), 'mean_ci': [round(mean_lo, 2), round(mean_hi, 2)],
+        'median': median, 'median_ci': [median_lo, median_hi],
+        'min': min(values), 'max': max(values),
+    }
+
+
+def summarize(results, policies):
+    """results — {(политика, номер партии): результат _run_one}."""
+    by_policy = {p: {} for p in policies}
+    for (policy, game), r in results.items():
+        if policy in by_policy:
+            by_policy[policy][game] = r
+
+    summary = {'policies': {}, 'head_to_head': []}
+    for policy, games in by_policy.items():
+        if not games:
+            continue
+        rs = list(games.values())
+        summary['policies'][policy] = {
+            'games': len(rs),
+            'score': describe([r['total_score'] for r in rs]),
+            'moves': describe([r['moves'] for r in rs]),
+            'level': describe([r['level'] for r in rs]),
+            'finished': sum(r['finished'] for r in rs) / len(rs),
+        }
+
+    for a, b in itertools.combinations(policies, 2):
+        common = sorted(by_policy[a].keys() & by_policy[b].keys())
+        if not common:
+            continue
+        diffs = [by_policy[a][g]['total_score'] - by_policy[b][g]['total_score'] for g in common]
+        mean, lo, hi = mean_ci(diffs)
+        summary['head_to_head'].append({
+            'a': a, 'b': b, 'games': len(common),
+            'a_wins': sum(d > 0 for d in diffs),
+            'b_wins': sum(d < 0 for d in diffs),
+            'ties': sum(d == 0 for d in diffs),
+            'score_diff': round(mean, 2), 'score_diff_ci': [round(lo, 2), round(hi, 2)],
+        })
+    return summary
+
+
+def format_summary(summary):
+    def cell(d, digits=0):
+        return '%.*f [%.*f..%.*f]  med %s [%s..%s]' % (
+            digits, d['mean'], digits, d['mean_ci'][0], digits, d['mean_ci'][1],
+            d['median'], d['median_ci'][0], d['median_ci'][1])
+
+    lines = []
+    for policy, s in summary['policies'].items():
+        lines.append('%s  (%d партий, до конца %.1f%%)' % (policy, s['games'], s['finished'] * 100))
+        lines.append('    очки    %s' % cell(s['score']))
+        lines.append('    ходы    %s' % cell(s['moves']))
+        lines.append('    уровень %s' % cell(s['level'], 2))
+    if summary['head_to_head']:
+        lines.append('')
+    for h in summary['head_to_head']:
+        lines.append('%s vs %s: %d/%d/%d (победы/поражения/ничьи), разница очков %+.1f [%+.1f..%+.1f]' % (
+            h['a'], h['b'], h['a_wins'], h['b_wins'], h['ties'],
+            h['score_diff'], h['score_diff_ci'][0], h['score_diff_ci'][1]))
+    return '\n'.join(lines)
+
+
+# --- ЧЕКПОИНТ ---
+
+def load_checkpoint(path, config):
+    """{(политика, партия): результат} из файла; параметры турнира должны совпасть."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, 'rb+') as f:
+        data = f.read()
+        # Хвост без перевода строки — запись оборвалась на полуслове
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+    lines = data[:end].decode('utf-8').splitlines()
+    if not lines:
+        return results
+    saved = json.loads(lines[0]).get('tournament')
+    if saved is None:
+        raise CheckpointError("%s — не чекпоинт турнира" % path)
+    for key in CONFIG_KEYS:
+        if saved.get(key) != config[key]:
+            raise CheckpointError("Чекпоинт %s сыгран с %s=%r, а не %r" % (
+                path, key, saved.get(key), config[key]))
+    for line in lines[1:]:
+        r = json.loads(line)
+        results[r['policy'], r['game']] = r
+    return results
+
+
+# --- ПРОГОН ---
+
+def pending_tasks(config, policies, games, done):
+    """Задачи для simulate._run_one: по сиду все политики подряд, сыгранные пропускаются."""
+    for i in range(games):
+        seed = simulate.game_seed(config['seed'], i)
+        for policy in policies:
+            if (policy, i) not in done:
+                yield (i, seed, config['mode'], policy, config['max_moves'], config['fair'])
+
+
+def play(tasks, workers, total):
+    """Результаты в порядке готовности (партии сильно разные по длине)."""
+    if workers <= 1:
+        for task in tasks:
+            yield simulate._run_one(task)
+        return
+    chunk = max(1, min(16, total // (workers * 16)))
+    with simulate.make_pool(workers) as pool:
+        for result in pool.imap_unordered(simulate._run_one, tasks, chunksize=chunk):
+            yield result
+
+
+def run(config, policies, games, workers, checkpoint=None, progress=None):
+    """Доигрывает турнир и возвращает {(политика, партия): результат}."""
+    results = load_checkpoint(checkpoint, config) if checkpoint else {}
+    total = sum(1 for _ in pending_tasks(config, policies, games, results))
+    out = None
+    if checkpoint:
+        out = open(checkpoint, 'a', encoding='utf-8')
+        if not out.tell():
+            out.write(json.dumps({'tournament': config}) + '\n')
+    try:
+        tasks = pending_tasks(config, policies, games, results)
+        for n, r in enumerate(play(tasks, workers, total), 1):
+            results[r['policy'], r['game']] = r
+            if out:
+                out.write(json.dumps(r) + '\n')
+            if n % FLUSH_EVERY == 0 or n == total:
+                if out:
+                    out.flush()
+                if progress:
+                    progress(n, total)
+    finally:
+        if out:
+            out.close()
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='main.py tournament',
+                                     description=__doc__.split('\n\n')[0])
+    parser.add_argument('--games', type=int, default=1000, help='партий на каждую политику')
+    parser.add_argument('--policies', nargs='+', choices=sorted(simulate.POLICIES),
+                        default=list(DEFAULT_POLICIES))
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', choices=('classic', 'adventure'), default='adventure')
+    parser.add_argument('--max-moves', type=int, default=simulate.MAX_MOVES)
+    parser.add_argument('--fair', action='store_true', help='честная раздача (dealer.FairDealer)')
+    parser.add_argument('--checkpoint', help='JSON Lines с результатами партий; продолжить с него')
+    parser.add_argument('--json', help='записать сводку в файл')
+    parser.add_argument('--quiet', action='store_true', help='без прогресса в stderr')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = {'seed': args.seed, 'mode': args.mode, 'fair': args.fair, 'max_moves': args.max_moves}
+    policies = list(dict.fromkeys(args.policies))
+
+    def progress(n, total):
+        sys.stderr.write('\r%d/%d' % (n, total))
+        if n == total:
+            sys.stderr.write('\n')
+
+    try:
+        results = run(config, policies, args.games, args.workers, args.checkpoint,
+                      None if args.quiet else progress)
+    except CheckpointError as e:
+        sys.stderr.write('%s\n' % e)
+        return 2
+    # Сводка — только по запрошенным партиям, даже если в чекпоинте их больше
+    results = {key: r for key, r in results.items() if key[1] < args.games}
+    summary = summarize(results, policies)
+    summary['config'] = dict(config, games=args.games)
+    print(format_summary(summary))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Пакетная оценка досок на NumPy (для подсказок и симуляций).
+
+Доски подаются массивом (N, size, size) uint8 с индексами [n, y, x]
+или массивом N упакованных uint64 (бит y * 8 + x, как engine.Board.mask).
+Всё считается операциями над целыми массивами, без цикла по доскам.
+
+NumPy — необязательная зависимость: в сборку приложения он не входит,
+модуль нужен только инструментам.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from engine import GRID_SIZE, SHAPES, line_points
+
+Evaluation = namedtuple('Evaluation', 'rows_full cols_full row_mask col_mask lines points fits')
+
+
+def unpack(boards, size=GRID_SIZE):
+    """N упакованных масок -> (N, size, size) uint8."""
+    if size * size > 64:
+        raise ValueError("В uint64 помещается поле не больше 8x8")
+    boards = np.asarray(boards, dtype=np.uint64).reshape(-1)
+    bits = np.arange(size * size, dtype=np.uint64)
+    cells = (boards[:, None] >> bits) & np.uint64(1)
+    return cells.astype(np.uint8).reshape(-1, size, size)
+
+
+def pack(cells):
+    """(N, size, size) -> N масок uint64 (поле не больше 8x8)."""
+    cells = np.asarray(cells, dtype=np.uint64)
+    n = cells.shape[0]
+    flat = cells.reshape(n, -1)
+    if flat.shape[1] > 64:
+        raise ValueError("В uint64 помещается поле не больше 8x8")
+    weights = np.uint64(1) << np.arange(flat.shape[1], dtype=np.uint64)
+    return (flat * weights).sum(axis=1, dtype=np.uint64)
+
+
+def as_cells(boards):
+    boards = np.asarray(boards)
+    if boards.ndim == 3:
+        return (boards != 0).astype(np.uint8)
+    return unpack(boards)
+
+
+def shape_fits(cells, shapes=SHAPES):
+    """(N, len(shapes)) bool: влезает ли фигура хоть куда-нибудь."""
+    n, size = cells.shape[0], cells.shape[1]
+    fits = np.zeros((n, len(shapes)), dtype=bool)
+    for k, shape in enumerate(shapes):
+        h = size - shape.height + 1
+        w = size - shape.width + 1
+        if h <= 0 or w <= 0:
+            continue
+        # Для каждой точки (gy, gx) — сколько клеток фигуры уже заняты
+        occupied = np.zeros((n, h, w), dtype=np.uint8)
+        for bx, by in shape.coords:
+            occupied += cells[:, by:by + h, bx:bx + w]
+        fits[:, k] = (occupied == 0).reshape(n, -1).any(axis=1)
+    return fits
+
+
+def evaluate(boards, shapes=SHAPES):
+    """
+    Полные строки/столбцы, число линий, очки как у GameScreen.check_lines
+    и влезаемость каждой фигуры (как check_game_over) для N досок сразу.
+    """
+    cells = as_cells(boards)
+    size = cells.shape[1]
+    rows_full = cells.all(axis=2)
+    cols_full = cells.all(axis=1)
+    weights = np.int64(1) << np.arange(size, dtype=np.int64)
+    lines = rows_full.sum(axis=1) + cols_full.sum(axis=1)
+    return Evaluation(
+        rows_full=rows_full,
+        cols_full=cols_full,
+        row_mask=rows_full @ weights,
+        col_mask=cols_full @ weights,
+        lines=lines,
+        points=line_points(lines),
+        fits=shape_fits(cells, shapes),
+    )